@@ -33,6 +33,10 @@ class MainWindow(TkinterDnDRoot):
         self.last_processed_video_path_for_sharing = tk.StringVar()
         self.last_generated_srt_path_for_sharing = tk.StringVar()
 
+        # Make sure the settings file has its sections before any tab loads or saves settings
+        from core import config_manager # Import here to avoid circular dependency on init
+        config_manager.initialize_config_if_needed()
+
         # --- Global API Key Configuration ---
         self.api_key_var = tk.StringVar()
         self._create_api_config_section()
@@ -1,6 +1,7 @@
 # EasyAISubbing/app_gui/ui_utils.py
 import tkinter as tk
-from tkinter import ttk, font as tkFont # Added ttk for consistency if needed
+from tkinter import ttk, messagebox, font as tkFont # Added ttk for consistency if needed
+import threading
 
 class ToolTip(object):
     def __init__(self, widget, text='widget info', wraplength=300):
@@ -139,4 +140,25 @@ def show_scrollable_messagebox(parent_window, title, message, default_font_famil
     ok_button = ttk.Button(button_frame, text="OK", command=top.destroy, style=ok_button_style)
     ok_button.pack(pady=5) # Add padding around button
 
-    parent_window.wait_window(top) # Wait for this dialog to close before parent can be interacted with
\ No newline at end of file
+    parent_window.wait_window(top) # Wait for this dialog to close before parent can be interacted with
+
+
+def ask_yes_no_from_thread(parent_window, title, message):
+    """
+    Shows messagebox.askyesno on the Tk main thread and returns the answer.
+    Safe to call from a worker thread: the dialog is scheduled with after() and the
+    caller blocks until the user answers. Called on the main thread, it just asks directly.
+    """
+    if threading.current_thread() is threading.main_thread():
+        return messagebox.askyesno(title, message, parent=parent_window)
+
+    result = {"answer": False}
+    answered = threading.Event()
+    def ask():
+        try:
+            result["answer"] = messagebox.askyesno(title, message, parent=parent_window)
+        finally:
+            answered.set()
+    parent_window.after(0, ask)
+    answered.wait()
+    return result["answer"]
@@ -6,6 +6,7 @@ import logging
 import os
 import srt
 import textwrap
+import threading
 import time # For _task_initial_gemini_processing
 
 try:
@@ -95,16 +96,16 @@ class VideoAudioTab(ttk.Frame):
         self.custom_font = self.app_controller.custom_font
 
         self.current_video_path = None
-        self.full_audio_path_for_gemini = None
         self.current_chat_session = None
         self.current_subtitle_data = ""
         self.last_detailed_analysis_messages = []
         self.suggested_auto_format_text = ""
+        self._tokenized_cache = None # (text, tokens) shared by Analyze/Refine tasks
         self.user_has_edited_subtitle_area = False
         self.edit_mode_label_packed = False # Initialize to prevent AttributeError
 
         self.progress_var = tk.DoubleVar()
-        self.cancel_requested = False
+        self._cancel_event = threading.Event() # Set by the Cancel button, polled by worker tasks
 
         # API Key is now managed globally in MainWindow
         # self.api_key_var = tk.StringVar() # Removed
@@ -122,6 +123,12 @@ class VideoAudioTab(ttk.Frame):
         self._init_ui_layout()
         self._load_initial_settings_for_tab()
         # Moved _load_gemini_models definition here
+
+    @property
+    def cancel_requested(self):
+        """True once the user has asked to cancel the running operation."""
+        return self._cancel_event.is_set()
+
     def _load_gemini_models(self):
         """Fetches and populates the Gemini model combobox."""
         self.logger.info("Fetching available Gemini models for Video/Audio Tab...")
@@ -415,6 +422,14 @@ class VideoAudioTab(ttk.Frame):
         audio_only = self.yt_dlp_audio_only_var.get()
         yt_dlp_helper.start_yt_dlp_download_task(url, self.app_controller, self, download_audio_only=audio_only)
 
+    def _finalize_yt_dlp_download(self, cancelled):
+        """Restores the UI after a yt-dlp task ends (main thread, scheduled by yt_dlp_helper)."""
+        if cancelled:
+            self._clear_all_process_states() # Clean up if user cancelled
+            self.video_file_var.set("Download cancelled")
+        self._set_ui_state(False) # Always re-enable UI
+        self.progress_var.set(0) # Always reset progress to 0
+
     def _handle_drop_event(self, event): # (Keep as is)
         if not DND_TAB_SUPPORTED: return
         self.yt_dlp_url_var.set("") # Clear URLs when dropping file
@@ -546,7 +561,7 @@ class VideoAudioTab(ttk.Frame):
         if not self.cancel_requested:
             if messagebox.askyesno("Cancel Process", "Are you sure you want to cancel the current operation?", parent=self.app_controller):
                 self.logger.info("Cancellation requested by user.")
-                self.cancel_requested = True
+                self._cancel_event.set()
                 if hasattr(self, 'cancel_button'):
                     self.cancel_button.config(text="Cancelling...", state="disabled")
 
@@ -600,14 +615,8 @@ class VideoAudioTab(ttk.Frame):
         self.current_chat_session = None
         self.last_detailed_analysis_messages = []
         self.suggested_auto_format_text = ""
+        self._tokenized_cache = None
         self.user_has_edited_subtitle_area = False
-        if self.full_audio_path_for_gemini and os.path.exists(self.full_audio_path_for_gemini):
-            try:
-                os.remove(self.full_audio_path_for_gemini)
-                self.logger.info(f"Cleaned up previous temp audio: {self.full_audio_path_for_gemini}")
-            except OSError as e:
-                self.logger.warning(f"Could not remove previous temp audio {self.full_audio_path_for_gemini}: {e}")
-        self.full_audio_path_for_gemini = None
         if hasattr(self, 'subtitle_edit_text_widget'):
             self._populate_subtitle_edit_area("Subtitle output from Gemini will appear here and will be editable.", make_editable=False)
             if hasattr(self, 'save_srt_button'): self.save_srt_button.config(state="disabled")
@@ -716,18 +725,18 @@ class VideoAudioTab(ttk.Frame):
         """
         try:
             self._update_progress(5, "Extracting audio...")
-            temp_audio_path = ffmpeg_utils.extract_audio(self.current_video_path) # Use self.app_controller and self._update_progress if extract_audio function supports it
+            # Piped from FFMPEG straight into memory: no temp WAV is written and read back
+            audio_bytes = ffmpeg_utils.extract_audio_to_wav_bytes(self.current_video_path)
             if self.cancel_requested:
                 self.logger.info("Cancellation requested during audio extraction.")
                 return
 
-            if not temp_audio_path or not os.path.exists(temp_audio_path):
+            if not audio_bytes:
                 self.after(0, lambda: messagebox.showerror("Processing Error", "Failed to extract audio.", parent=self.app_controller))
                 self.logger.error("Audio extraction failed.")
                 return
 
-            self.full_audio_path_for_gemini = temp_audio_path
-            self.logger.info(f"Audio extracted to: {temp_audio_path}")
+            self.logger.info(f"Audio extracted: {len(audio_bytes) / (1024 * 1024):.1f} MB WAV")
 
             self._update_progress(20, "Sending audio to Gemini...")
 
@@ -746,8 +755,6 @@ class VideoAudioTab(ttk.Frame):
             )
 
             prompt_part = gemini_utils.to_part(initial_prompt)
-            with open(temp_audio_path, 'rb') as f_audio:
-                audio_bytes = f_audio.read()
             audio_part = gemini_utils.to_part({"mime_type": "audio/wav", "data": audio_bytes})
 
             if self.cancel_requested:
@@ -785,14 +792,6 @@ class VideoAudioTab(ttk.Frame):
                 self.after(0, lambda err=e: messagebox.showerror("Critical Error", f"An unexpected error occurred during Gemini processing: {err}. Check logs.", parent=self.app_controller))
             self._update_progress(100, "Gemini processing failed or cancelled.")
         finally:
-            # Clean up temp audio file regardless of success/failure, unless cancelled midway
-            if self.full_audio_path_for_gemini and os.path.exists(self.full_audio_path_for_gemini):
-                 try:
-                     os.remove(self.full_audio_path_for_gemini)
-                     self.logger.info(f"Cleaned up temp audio: {self.full_audio_path_for_gemini}")
-                 except OSError as e:
-                     self.logger.warning(f"Could not remove temp audio {self.full_audio_path_for_gemini}: {e}")
-            self.full_audio_path_for_gemini = None # Reset the path
             self.after(0, self._set_ui_state, False)
             if self.cancel_requested:
                  self.logger.info("Initial Gemini process was cancelled by user.")
@@ -812,7 +811,7 @@ class VideoAudioTab(ttk.Frame):
             return
 
         self._save_current_ui_settings()
-        self.cancel_requested = False
+        self._cancel_event.clear()
         self._set_ui_state(processing=True)
         self.logger.info(f"Starting Gemini Processing for: {os.path.basename(self.current_video_path)}")
         self.progress_var.set(0)
@@ -863,7 +862,7 @@ class VideoAudioTab(ttk.Frame):
                                parent=self.app_controller):
             self.logger.info("Starting subtitle timing refinement...")
             self._set_ui_state(processing=True)
-            self.cancel_requested = False
+            self._cancel_event.clear()
             import threading
             thread = threading.Thread(target=video_audio_tasks.task_refine_timing, args=(self.app_controller, self, current_subtitle_text_to_opt,), daemon=True)
             thread.start()
@@ -993,7 +992,7 @@ class VideoAudioTab(ttk.Frame):
         if not custom_prompt:
             messagebox.showerror("Error", "Custom prompt is empty. Cannot send to Gemini.", parent=self.app_controller)
             return
-        self.cancel_requested = False
+        self._cancel_event.clear()
         self._set_ui_state(processing=True)
         self.progress_var.set(0)
         self.logger.info("Requesting Gemini Fix with Custom Prompt...")
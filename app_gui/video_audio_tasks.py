@@ -25,28 +25,45 @@ logger = logging.getLogger(__name__)
 # def task_request_gemini_fix(...):
 #     pass
 
+def _get_tokenized_gemini_lines(tab_instance, subtitle_text):
+    """
+    Returns srt_utils tokens for the given text, reusing the tab's cache when the
+    same text was already tokenized (e.g. Analyze followed by Refine Timing).
+    """
+    cached = tab_instance._tokenized_cache
+    # Compared by value, not by hash, so a hash collision cannot reuse another text's tokens
+    if cached is not None and cached[0] == subtitle_text:
+        return cached[1]
+    tokens = srt_utils.tokenize_gemini_lines(subtitle_text)
+    tab_instance._tokenized_cache = (subtitle_text, tokens)
+    return tokens
+
 def task_analyze_timestamps_python_only(app_controller, tab_instance, subtitle_text_to_analyze):
     """
     Task to perform detailed subtitle timestamp analysis using Python (srt_utils).
     Runs in a separate thread.
     """
     try:
-        tab_instance.logger.info(f"Analyzing subtitle content (first 200 chars):\n{subtitle_text_to_analyze[:200]}...\n")
+        if tab_instance.logger.isEnabledFor(logging.INFO):
+            tab_instance.logger.info("Analyzing subtitle content (first 200 chars):\n%s...\n", subtitle_text_to_analyze[:200])
         raw_lines = subtitle_text_to_analyze.splitlines()
-        tab_instance.last_detailed_analysis_messages = srt_utils.detailed_analyze_gemini_output(raw_lines)
-        corrected_lines_list_by_python, norm_log_messages = srt_utils.analyze_and_pre_correct_gemini_lines_for_srt(raw_lines)
+        tokens = _get_tokenized_gemini_lines(tab_instance, subtitle_text_to_analyze)
+        tab_instance.last_detailed_analysis_messages = srt_utils.detailed_analyze_gemini_output(raw_lines, tokens=tokens)
+        corrected_lines_list_by_python, norm_log_messages = srt_utils.analyze_and_pre_correct_gemini_lines_for_srt(raw_lines, tokens=tokens)
         tab_instance.suggested_auto_format_text = "\n".join(corrected_lines_list_by_python)
         actionable_issues_for_user_messagebox = []
         if tab_instance.last_detailed_analysis_messages:
+            log_findings = tab_instance.logger.isEnabledFor(logging.INFO)
             tab_instance.logger.info("--- Detailed Subtitle Analysis (All Findings) ---")
             for msg in tab_instance.last_detailed_analysis_messages:
-                tab_instance.logger.info(f"- {msg}")
+                if log_findings: tab_instance.logger.info("- %s", msg)
                 if "ERROR" in msg.upper() or "WARNING" in msg.upper():
                     actionable_issues_for_user_messagebox.append(msg)
         tab_instance.after(0, lambda: tab_instance.review_auto_format_button.config(state=tk.DISABLED))
         if norm_log_messages:
             tab_instance.logger.info("--- Auto-Formatting Attempt Log (Python Pre-correction) ---")
-            for log_msg in norm_log_messages: tab_instance.logger.info(f"  {log_msg}")
+            if tab_instance.logger.isEnabledFor(logging.INFO):
+                for log_msg in norm_log_messages: tab_instance.logger.info("  %s", log_msg)
             original_text_for_compare = "\n".join(raw_lines)
             if tab_instance.suggested_auto_format_text.strip() != original_text_for_compare.strip():
                 tab_instance.logger.info("Auto-formatter has generated a version with attempted corrections.")
@@ -94,13 +111,15 @@ def task_refine_timing(app_controller, tab_instance, subtitle_text_to_refine):
     Task to refine subtitle timing (gaps/overlaps) using Python (srt_utils).
     Runs in a separate thread.
     """
+    cancel_evt = tab_instance._cancel_event
     try:
         tab_instance.logger.info("Starting timing refinement process...")
         tab_instance._update_progress(10, "Converting to SRT for refinement...")
         standard_srt_content_str, conversion_errors = srt_utils.convert_gemini_format_to_srt_content(
-            subtitle_text_to_refine, apply_python_normalization=True
+            subtitle_text_to_refine, apply_python_normalization=True,
+            tokens=_get_tokenized_gemini_lines(tab_instance, subtitle_text_to_refine)
         )
-        if tab_instance.cancel_requested: tab_instance.logger.info("Timing refinement cancelled during SRT conversion."); return
+        if cancel_evt.is_set(): tab_instance.logger.info("Timing refinement cancelled during SRT conversion."); return
         if conversion_errors:
             tab_instance.logger.warning("--- Issues during conversion to standard SRT for timing refinement ---")
             for err_msg in conversion_errors: tab_instance.logger.warning(f"  {err_msg}")
@@ -118,25 +137,28 @@ def task_refine_timing(app_controller, tab_instance, subtitle_text_to_refine):
             tab_instance.logger.error(f"SRT Parse Error during timing refinement: {e_srt_parse}")
             tab_instance.after(0, lambda err=e_srt_parse: messagebox.showerror("Timing Refinement Error", f"Could not parse subtitles for refinement.\nDetails: {err}", parent=app_controller))
             return
-        if tab_instance.cancel_requested: tab_instance.logger.info("Timing refinement cancelled after SRT parsing."); return
+        if cancel_evt.is_set(): tab_instance.logger.info("Timing refinement cancelled after SRT parsing."); return
         if not original_subs_list:
             tab_instance.logger.warning("No subtitles parsed for timing refinement.")
             tab_instance.after(0, lambda: messagebox.showinfo("Timing Refinement", "No subtitles parsed to refine.", parent=app_controller))
             return
         tab_instance._update_progress(50, "Applying timing refinement rules...")
         refined_subs_list, change_logs = srt_utils.refine_subtitle_timing(original_subs_list)
-        if tab_instance.cancel_requested: tab_instance.logger.info("Timing refinement cancelled after applying rules."); return
+        if cancel_evt.is_set(): tab_instance.logger.info("Timing refinement cancelled after applying rules."); return
         tab_instance._update_progress(80, "Reformatting refined subs back to Gemini format...")
         refined_gemini_format_lines = []
         for sub_obj in refined_subs_list:
             start_str = srt_utils.format_timedelta_to_gemini_style(sub_obj.start)
             end_str = srt_utils.format_timedelta_to_gemini_style(sub_obj.end)
-            content_for_gemini_line = sub_obj.content.replace('\n', ' ')
+            content_for_gemini_line = sub_obj.content
+            if '\n' in content_for_gemini_line: # Most cues are single-line; avoid a copy
+                content_for_gemini_line = content_for_gemini_line.replace('\n', ' ')
             refined_gemini_format_lines.append(f"[{start_str} - {end_str}] {content_for_gemini_line}")
         refined_output_for_editor = "\n".join(refined_gemini_format_lines)
         if change_logs:
             tab_instance.logger.info("--- Timing Refinement Log ---")
-            for log_entry in change_logs: tab_instance.logger.info(f"  {log_entry}")
+            if tab_instance.logger.isEnabledFor(logging.INFO):
+                for log_entry in change_logs: tab_instance.logger.info("  %s", log_entry)
             if subtitle_text_to_refine.strip() == refined_output_for_editor.strip() :
                  tab_instance.logger.info("Timing refinement: no actual content changes after re-formatting to Gemini style.")
                  tab_instance.after(0, lambda: messagebox.showinfo("Timing Refinement", "No significant timing changes were applied or needed.", parent=app_controller))
@@ -153,12 +175,12 @@ def task_refine_timing(app_controller, tab_instance, subtitle_text_to_refine):
             tab_instance.after(0, lambda: messagebox.showinfo("Timing Refinement", "No timing adjustments were necessary.", parent=app_controller))
         tab_instance._update_progress(100, "Timing refinement complete.")
     except Exception as e:
-        if not tab_instance.cancel_requested:
+        if not cancel_evt.is_set():
             tab_instance.logger.error(f"Error during timing refinement: {e}", exc_info=True)
             tab_instance.after(0, lambda err=e: messagebox.showerror("Timing Refinement Error", f"An error occurred: {err}", parent=app_controller))
         tab_instance._update_progress(100, "Timing refinement failed or cancelled.")
     finally:
-        if not tab_instance.cancel_requested:
+        if not cancel_evt.is_set():
             tab_instance.after(0, tab_instance._set_ui_state, False)
 
 def task_request_gemini_fix(app_controller, tab_instance, custom_correction_prompt):
@@ -166,15 +188,16 @@ def task_request_gemini_fix(app_controller, tab_instance, custom_correction_prom
     Task to send a custom prompt to Gemini for subtitle correction.
     Runs in a separate thread.
     """
+    cancel_evt = tab_instance._cancel_event
     try:
         tab_instance.logger.info("TASK: Sending custom correction prompt to Gemini...")
         tab_instance._update_progress(10, "Preparing custom prompt for Gemini fix...")
-        if tab_instance.cancel_requested: tab_instance.logger.info("Cancelled before sending fix request to Gemini."); return
+        if cancel_evt.is_set(): tab_instance.logger.info("Cancelled before sending fix request to Gemini."); return
         tab_instance._update_progress(30, "Sending fix request to Gemini...")
         temperature_for_fix = tab_instance.gemini_temperature_var.get()
         correction_text_part = gemini_utils.to_part(custom_correction_prompt)
         response_text_fixed = gemini_utils.send_message_to_chat(tab_instance.current_chat_session, [correction_text_part], temperature_for_fix)
-        if tab_instance.cancel_requested: tab_instance.logger.info("Cancelled after Gemini fix response."); return
+        if cancel_evt.is_set(): tab_instance.logger.info("Cancelled after Gemini fix response."); return
         if response_text_fixed is None or response_text_fixed.startswith(("[Error]", "[Blocked]")):
             tab_instance.logger.error(f"Gemini fix request API call failed/blocked. Response: {response_text_fixed}")
             tab_instance.after(0, lambda resp=response_text_fixed: messagebox.showerror("Gemini API Error", f"Gemini processing failed or was blocked.\nDetails: {resp}", parent=app_controller))
@@ -184,12 +207,12 @@ def task_request_gemini_fix(app_controller, tab_instance, custom_correction_prom
             tab_instance.after(0, lambda: messagebox.showinfo("Gemini Custom Fix Complete", "Gemini attempted to apply corrections based on your prompt. Please review the output and run 'Analyze Timestamps' again.", parent=app_controller))
         tab_instance._update_progress(100, "Gemini custom fix attempt complete.")
     except Exception as e:
-        if not tab_instance.cancel_requested:
+        if not cancel_evt.is_set():
             tab_instance.logger.error(f"Critical error in task_request_gemini_fix: {e}", exc_info=True)
             tab_instance.after(0, lambda err=e: messagebox.showerror("Critical Error", f"An unexpected error occurred during Gemini fix request: {err}. Check logs.", parent=app_controller))
     finally:
         tab_instance.after(0, tab_instance._set_ui_state, False)
         if hasattr(tab_instance, 'request_gemini_fix_button'):
             tab_instance.after(0, lambda: tab_instance.request_gemini_fix_button.config(state=tk.DISABLED))
-        if tab_instance.cancel_requested:
+        if cancel_evt.is_set():
             tab_instance.logger.info("Gemini custom fix process was cancelled by user.")
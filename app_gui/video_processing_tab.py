@@ -6,10 +6,10 @@ import logging
 import os
 import threading # Will be needed when adding encode/mux tasks
 import time # For generating unique filenames or time-related tasks
-import subprocess # To run FFMPEG
-import re # Import re for regex parsing
+import collections
+import queue
+import contextlib
 import tkinter.colorchooser # Import colorchooser
-from queue import Queue, Empty # Import Queue and Empty for thread-safe communication
 
 # Try importing tkinterdnd2 for drag and drop support
 DND_TAB_SUPPORTED = False # Initialize DND support flag
@@ -27,6 +27,48 @@ from core import config_manager # Import config_manager here to avoid circular d
 
 logger = logging.getLogger(__name__) # Will be app_gui.video_processing_tab
 
+# --- Combobox choices (built once at import, shared by every tab instance) ---
+_FONT_CHOICES = ("Arial", "Times New Roman", "Courier New", "Verdana", "Tahoma", "Georgia")
+_SIZE_CHOICES = ("18", "20", "22", "24", "26", "28", "30")
+_POSITION_CHOICES = ("Bottom Center", "Bottom Left", "Bottom Right", "Top Center", "Top Left", "Top Right")
+_FONT_ENCODING_CHOICES = ("UTF-8", "SHIFT_JIS", "CP1252", "GBK", "Big5")
+_RESOLUTION_CHOICES = ("Original", "1920x1080", "1280x720", "854x480", "640x360")
+# Note: Available encoders depend on FFmpeg build. Providing common ones.
+_ENCODER_CHOICES = ("libx264", "libx265", "h264_nvenc", "hevc_nvenc", "h264_amf", "hevc_amf", "h264_qsv", "hevc_qsv", "libvpx", "libvpx-vp9", "libaom-av1")
+_AUDIO_HANDLING_CHOICES = ("copy", "encode")
+_OUTPUT_FORMAT_CHOICES = ("mp4", "mkv")
+# File types accepted by drag-and-drop (set lookups, shared by any multi-file drop loop)
+_VIDEO_EXTS = frozenset({".mp4", ".mkv", ".avi", ".mov", ".wmv", ".flv", ".webm"})
+_SUB_EXTS = frozenset({".srt", ".ass", ".ssa", ".vtt"})
+# Log lines are buffered and written to the log widget in one insert per interval
+_LOG_FLUSH_INTERVAL_MS = 50
+# Time FFMPEG gets to exit after a cancel before it is killed: long enough to finalize the output
+# after SIGINT, short on Windows where cancel can only terminate it
+_FFMPEG_INTERRUPT_GRACE_MS = 10000 if ffmpeg_utils.CAN_INTERRUPT_GRACEFULLY else 5000
+# The log widget only keeps the most recent _LOG_VIEW_LINES lines (older ones are trimmed from the top),
+# so its cost stays bounded however long FFMPEG runs (Tk's Text slows down as content grows)
+_LOG_VIEW_LINES = 500
+
+# Config keys persisted by this tab and their defaults (loaded/saved in one file access)
+_SETTINGS_DEFAULTS = {
+    "video_processing_mode": "mux",
+    "hardsub_font": "Arial",
+    "hardsub_size": "24",
+    "hardsub_color": "&H00FFFFFF",
+    "hardsub_outline_color": "&H00000000",
+    "hardsub_outline": "1",
+    "hardsub_shadow": "0.5",
+    "hardsub_position": "Bottom Center",
+    "hardsub_resolution": "Original",
+    "hardsub_crf": "23",
+    "video_encoder": "libx264",
+    "hardsub_font_encoding": "UTF-8",
+    "audio_handling": "copy",
+    "output_format": "mp4",
+    "output_directory": "",
+    "ffmpeg_threads": "0", # Advanced: cap encoder threads (config-only, no UI)
+}
+
 
 class VideoProcessingTab(ttk.Frame):
     def __init__(self, parent_notebook, app_controller):
@@ -47,13 +89,31 @@ class VideoProcessingTab(ttk.Frame):
         self.process_mode_var = tk.StringVar(value="mux") # "mux" (softsub) or "hardsub"
         self.processing_status_var = tk.StringVar(value="Idle.")
         self.processing_progress_var = tk.DoubleVar(value=0)
+        self._progress_indeterminate = False # True while the progress bar is animating (mux)
+        # Latest progress/status waiting to be pushed to the widgets by _flush_processing_ui
+        self._pending_progress = None
+        self._pending_status = None
+        self._ui_flush_pending = False
+        self._last_progress_int = -1 # Whole percent last shown on the progress bar
+        self._last_progress = 0 # Last requested progress value, read by workers instead of the Tk var
+        self._ui_batch_depth = 0 # Nesting level of _batch_ui blocks
+        self._ui_batch_ops = [] # UI operations collected by the outermost _batch_ui block
+        self._bbox_after = None # Pending debounced scrollregion update
+        self._canvas_width_after = None # Pending debounced inner-frame width update
+        self._dirty_settings = {} # Changed settings waiting for the debounced config write
+        self._save_after_id = None
         self.cancel_video_processing_requested = False
         self._ffmpeg_process = None # To hold the subprocess object
-        self._stdout_queue = Queue() # Queue for thread-safe stdout reading
-        self._stderr_queue = Queue() # Queue for thread-safe stderr reading
-        self._stdout_thread = None # To hold the stdout reading thread
-        self._stderr_thread = None # To hold the stderr reading thread
+        self._stderr_log_path = None # Temp file FFMPEG's stderr is redirected to
+        self._stderr_log_reader = None # Handle used to tail that file (stdout reader, then the final drain)
+        self._stderr_partial = b"" # Unterminated trailing stderr line from the last read
+        self._ffmpeg_progress_block = {} # out_time_us/speed of the -progress block being read
+        self._log_buffer = collections.deque() # Lines waiting for _flush_log_buffer (append/popleft are thread-safe)
+        self._log_flush_scheduled = False
+        self._log_view_line_count = 0 # Lines currently in the log widget, at most _LOG_VIEW_LINES
         self.video_duration = 0 # Add video_duration attribute
+        self._progress_percent_per_us = None # 80% / duration in microseconds, set per job
+        self._video_duration_text = "N/A" # Duration as HH:MM:SS.ss, set per job
 
         # Hardsub Options Variables
         self.hardsub_font_var = tk.StringVar(value="Arial")
@@ -69,14 +129,29 @@ class VideoProcessingTab(ttk.Frame):
         self.hardsub_font_encoding_var = tk.StringVar(value="UTF-8") # Default font encoding
         self.audio_handling_var = tk.StringVar(value="copy") # Default audio handling
         self.output_format_var = tk.StringVar(value="mp4") # Default output format
+        self._ass_rgb_cache = {} # ASS color string -> (R, G, B) for the color choosers
+        self.ffmpeg_threads_var = tk.StringVar(value="0") # Encoder threads, 0 = all cores (config-only, no UI)
 
-        # --- Load Settings ---
-        self._load_settings()
+        self._alive = True # Cleared on <Destroy>; saves a winfo_exists() Tcl round-trip per update
+        self.bind("<Destroy>", self._on_destroy, add="+")
 
         # --- Build Tab UI ---
         self._init_tab_ui()
         self.logger.info("VideoProcessingTab UI initialized.")
 
+        # --- Load Settings ---
+        # config_manager serves these from its in-memory cache, so loading here does not block the UI.
+        # Only the FFMPEG encoder probe (a subprocess) runs off the Tk thread.
+        self._load_settings()
+        self._start_encoder_probe()
+
+        # D&D registration is not needed for the first paint, so it runs once the loop is idle
+        self.after_idle(self._register_drop_target)
+
+    def _register_drop_target(self):
+        """Registers the tab frame as a file drop target (deferred from __init__ via after_idle)."""
+        if not self._alive:
+            return
         if DND_TAB_SUPPORTED:
             # Register the tab frame itself as a drop target for files
             try:
@@ -112,12 +187,10 @@ class VideoProcessingTab(ttk.Frame):
         filename, file_extension = os.path.splitext(filepath)
         file_extension = file_extension.lower()
 
-        video_extensions = (".mp4", ".mkv", ".avi", ".mov", ".wmv", ".flv", ".webm")
-        subtitle_extensions = (".srt", ".ass", ".ssa", ".vtt")
-
-        if file_extension in video_extensions:
+        if file_extension in _VIDEO_EXTS:
             self.input_video_path_var.set(filepath)
             self.logger.info(f"Video file processed from drop: {filepath}")
+            self._prefetch_video_duration(filepath)
             # Suggest output directory
             input_dir = os.path.dirname(filepath)
             self.output_file_path_var.set(input_dir)
@@ -126,7 +199,7 @@ class VideoProcessingTab(ttk.Frame):
             self.input_subtitle_path_var.set("")
             self._update_hardsub_ui_state() # Update UI state if needed
 
-        elif file_extension in subtitle_extensions:
+        elif file_extension in _SUB_EXTS:
             self.input_subtitle_path_var.set(filepath)
             self.logger.info(f"Subtitle file processed from drop: {filepath}")
             self._update_hardsub_ui_state() # Update UI state based on new subtitle type
@@ -138,51 +211,106 @@ class VideoProcessingTab(ttk.Frame):
                                    parent=self.app_controller)
             self.logger.warning(f"Unsupported file type dropped on Video Processing tab: {filepath}")
 
+    def _settings_vars(self):
+        """Maps each config key in _SETTINGS_DEFAULTS to the tk variable holding it."""
+        return {
+            "video_processing_mode": self.process_mode_var,
+            "hardsub_font": self.hardsub_font_var,
+            "hardsub_size": self.hardsub_size_var,
+            "hardsub_color": self.hardsub_color_var,
+            "hardsub_outline_color": self.hardsub_outline_color_var,
+            "hardsub_outline": self.hardsub_outline_var,
+            "hardsub_shadow": self.hardsub_shadow_var,
+            "hardsub_position": self.hardsub_position_var,
+            "hardsub_resolution": self.hardsub_resolution_var,
+            "hardsub_crf": self.hardsub_crf_var,
+            "video_encoder": self.video_encoder_var,
+            "hardsub_font_encoding": self.hardsub_font_encoding_var,
+            "audio_handling": self.audio_handling_var,
+            "output_format": self.output_format_var,
+            "output_directory": self.output_file_path_var, # Stores the output directory
+            "ffmpeg_threads": self.ffmpeg_threads_var,
+        }
+
     def _load_settings(self):
-        """Loads settings for the Video Processing tab from config."""
-        # from core import config_manager # Import locally to avoid circular dependency if core imports app_gui
-
-        self.process_mode_var.set(config_manager.load_setting("video_processing_mode", "mux"))
-        self.hardsub_font_var.set(config_manager.load_setting("hardsub_font", "Arial"))
-        self.hardsub_size_var.set(config_manager.load_setting("hardsub_size", "24"))
-        self.hardsub_color_var.set(config_manager.load_setting("hardsub_color", "&H00FFFFFF"))
-        self.hardsub_outline_color_var.set(config_manager.load_setting("hardsub_outline_color", "&H00000000"))
-        self.hardsub_outline_var.set(config_manager.load_setting("hardsub_outline", "1"))
-        self.hardsub_shadow_var.set(config_manager.load_setting("hardsub_shadow", "0.5"))
-        self.hardsub_position_var.set(config_manager.load_setting("hardsub_position", "Bottom Center"))
-        self.hardsub_resolution_var.set(config_manager.load_setting("hardsub_resolution", "Original"))
-        self.hardsub_crf_var.set(config_manager.load_setting("hardsub_crf", "23"))
-        self.video_encoder_var.set(config_manager.load_setting("video_encoder", "libx264")) # Load encoder setting
-        self.hardsub_font_encoding_var.set(config_manager.load_setting("hardsub_font_encoding", "UTF-8")) # Load font encoding
-        self.audio_handling_var.set(config_manager.load_setting("audio_handling", "copy")) # Load audio handling
-        self.output_format_var.set(config_manager.load_setting("output_format", "mp4")) # Load output format
-        self.output_file_path_var.set(config_manager.load_setting("output_directory", "")) # Load output directory
+        """Reads the tab's settings from config and applies them to the tk variables (main thread only)."""
+        try:
+            values = config_manager.load_settings(_SETTINGS_DEFAULTS)
+        except Exception as e:
+            self.logger.error(f"Error loading Video Processing tab settings: {e}", exc_info=True)
+            values = dict(_SETTINGS_DEFAULTS)
+        for key, var in self._settings_vars().items():
+            var.set(values[key])
+        self._register_settings_traces() # After applying, so the loaded values are not re-saved
+        self._update_hardsub_ui_state() # Mode/subtitle-dependent widgets follow the loaded values
 
         self.logger.info("Video Processing tab settings loaded.")
 
+    def _start_encoder_probe(self):
+        """
+        Probes FFMPEG's encoders on a worker thread. The worker never touches Tk (it may finish
+        before mainloop() starts); the Tk thread picks the result up in _poll_encoder_probe.
+        """
+        self._encoder_probe_result = queue.Queue(maxsize=1)
+        threading.Thread(target=lambda: self._encoder_probe_result.put(ffmpeg_utils.list_available_encoders()),
+                         daemon=True).start()
+        self.after(100, self._poll_encoder_probe)
+
+    def _poll_encoder_probe(self):
+        """Applies the encoder probe result once the worker has posted it (main thread only)."""
+        if not self._alive:
+            return
+        try:
+            available_encoders = self._encoder_probe_result.get_nowait()
+        except queue.Empty:
+            self.after(100, self._poll_encoder_probe)
+            return
+        self._apply_available_encoders(available_encoders)
+
+    def _apply_available_encoders(self, available_encoders):
+        """Limits the encoder choices to those the installed FFMPEG supports (main thread only)."""
+        if not available_encoders: # Probe failed; keep the full list
+            return
+        choices = [name for name in _ENCODER_CHOICES if name in available_encoders]
+        if not choices:
+            return
+        self.video_encoder_combobox['values'] = choices
+        self.logger.info(f"Available video encoders: {', '.join(choices)}")
+        if self.video_encoder_var.get() not in available_encoders and "libx264" in choices:
+            self.logger.warning(f"Saved encoder '{self.video_encoder_var.get()}' is not supported by this FFMPEG build, switching to libx264.")
+            self.video_encoder_var.set("libx264")
+
     def _save_settings(self):
         """Saves current settings of the Video Processing tab to config."""
-        # from core import config_manager # Import locally
-
-        config_manager.save_setting("video_processing_mode", self.process_mode_var.get())
-        config_manager.save_setting("hardsub_font", self.hardsub_font_var.get())
-        config_manager.save_setting("hardsub_size", self.hardsub_size_var.get())
-        config_manager.save_setting("hardsub_color", self.hardsub_color_var.get())
-        config_manager.save_setting("hardsub_outline_color", self.hardsub_outline_color_var.get())
-        config_manager.save_setting("hardsub_outline", self.hardsub_outline_var.get())
-        config_manager.save_setting("hardsub_shadow", self.hardsub_shadow_var.get())
-        config_manager.save_setting("hardsub_position", self.hardsub_position_var.get())
-        config_manager.save_setting("hardsub_resolution", self.hardsub_resolution_var.get())
-        config_manager.save_setting("hardsub_crf", self.hardsub_crf_var.get())
-        config_manager.save_setting("video_encoder", self.video_encoder_var.get()) # Save encoder setting
-        config_manager.save_setting("hardsub_font_encoding", self.hardsub_font_encoding_var.get()) # Save font encoding
-        config_manager.save_setting("audio_handling", self.audio_handling_var.get()) # Save audio handling
-        config_manager.save_setting("output_format", self.output_format_var.get()) # Save output format
-        config_manager.save_setting("output_directory", self.output_file_path_var.get()) # Save output directory
-
+        if self._save_after_id:
+            self.after_cancel(self._save_after_id)
+            self._save_after_id = None
+        self._dirty_settings = {} # Superseded by the full save below
+        config_manager.save_settings({key: var.get() for key, var in self._settings_vars().items()})
 
         self.logger.info("Video Processing tab settings saved.")
 
+    def _register_settings_traces(self):
+        """Persists settings as the user changes them, batched by _mark_setting_dirty."""
+        for key, var in self._settings_vars().items():
+            var.trace_add("write", lambda *_args, k=key, v=var: self._mark_setting_dirty(k, v.get()))
+
+    def _mark_setting_dirty(self, key, value):
+        """Records a changed setting and (re)starts the 1s timer that writes all pending changes at once."""
+        self._dirty_settings[key] = value
+        if self._save_after_id:
+            self.after_cancel(self._save_after_id)
+        self._save_after_id = self.after(1000, self._flush_settings)
+
+    def _flush_settings(self):
+        """Writes the settings changed since the last flush in a single config write."""
+        self._save_after_id = None
+        if not self._dirty_settings:
+            return
+        dirty_settings, self._dirty_settings = self._dirty_settings, {}
+        config_manager.save_settings(dirty_settings)
+        self.logger.debug(f"Flushed {len(dirty_settings)} changed Video Processing setting(s).")
+
 
     def _init_tab_ui(self):
         """Initializes the UI elements for this tab."""
@@ -200,16 +328,29 @@ class VideoProcessingTab(ttk.Frame):
         # The window=main_frame argument tells the canvas what to scroll
         canvas_window = canvas.create_window((0, 0), window=main_frame, anchor="nw")
 
-        # Configure canvas to resize the frame with the window
+        # Configure canvas to resize the frame with the window.
+        # Both handlers are debounced: a window drag fires <Configure> per pixel, and
+        # bbox("all") walks every child, so only the last event in a 50ms burst is applied.
+        def update_scrollregion():
+            self._bbox_after = None
+            canvas.configure(scrollregion=canvas.bbox("all"))
+
         def on_frame_configure(event):
             # Update the scrollregion when the size of the frame changes
-            canvas.configure(scrollregion=canvas.bbox("all"))
+            if self._bbox_after:
+                self.after_cancel(self._bbox_after)
+            self._bbox_after = self.after(50, update_scrollregion)
         main_frame.bind("<Configure>", on_frame_configure)
 
+        def update_frame_width(canvas_width):
+            self._canvas_width_after = None
+            canvas.itemconfig(canvas_window, width=canvas_width)
+
         def on_canvas_configure(event):
             # Update the frame's width when the canvas width changes
-            canvas_width = event.width
-            canvas.itemconfig(canvas_window, width=canvas_width)
+            if self._canvas_width_after:
+                self.after_cancel(self._canvas_width_after)
+            self._canvas_width_after = self.after(50, update_frame_width, event.width)
         canvas.bind("<Configure>", on_canvas_configure)
 
         main_frame.columnconfigure(1, weight=1) # Allow Entry widgets to expand
@@ -256,7 +397,8 @@ class VideoProcessingTab(ttk.Frame):
 
         # Hardsub Options Frame (initially hidden)
         self.hardsub_options_frame = ttk.LabelFrame(options_frame, text="Hardsub Options", padding="10")
-        # This frame will be packed/unpacked by _on_processing_mode_change
+        # This frame will be packed/unpacked by _update_hardsub_ui_state
+        self._hardsub_frame_visible = False
 
         # Hardsub Options Widgets (inside hardsub_options_frame)
         hardsub_options_frame_row = 0
@@ -277,84 +419,92 @@ class VideoProcessingTab(ttk.Frame):
         # Subtitle Settings Widgets (inside subtitle_settings_frame)
 
         # Row 0: Font, Size
-        ttk.Label(self.subtitle_settings_frame, text="Font:").grid(row=subtitle_row, column=0, sticky=tk.W, padx=5, pady=2)
+        font_lbl = ttk.Label(self.subtitle_settings_frame, text="Font:")
+        font_lbl.grid(row=subtitle_row, column=0, sticky=tk.W, padx=5, pady=2)
         self.hardsub_font_combobox = ttk.Combobox(self.subtitle_settings_frame, textvariable=self.hardsub_font_var, width=15)
-        self.hardsub_font_combobox['values'] = ("Arial", "Times New Roman", "Courier New", "Verdana", "Tahoma", "Georgia")
+        self.hardsub_font_combobox['values'] = _FONT_CHOICES
         self.hardsub_font_combobox.grid(row=subtitle_row, column=1, sticky=tk.EW, padx=5, pady=2)
         self.hardsub_font_combobox.bind("<<ComboboxSelected>>", self._handle_combobox_selection_visual_reset)
-        ToolTip(ttk.Label(self.subtitle_settings_frame, text="Font:"), "Select or type the font name for hardsubtitles.") # Tooltip for Label
+        ToolTip(font_lbl, "Select or type the font name for hardsubtitles.") # Tooltip for Label
         ToolTip(self.hardsub_font_combobox, "Select or type the font name for hardsubtitles.") # Tooltip for Combobox
 
 
-        ttk.Label(self.subtitle_settings_frame, text="Size:").grid(row=subtitle_row, column=2, sticky=tk.W, padx=5, pady=2)
+        size_lbl = ttk.Label(self.subtitle_settings_frame, text="Size:")
+        size_lbl.grid(row=subtitle_row, column=2, sticky=tk.W, padx=5, pady=2)
         self.hardsub_size_combobox = ttk.Combobox(self.subtitle_settings_frame, textvariable=self.hardsub_size_var, width=5)
-        self.hardsub_size_combobox['values'] = ("18", "20", "22", "24", "26", "28", "30")
+        self.hardsub_size_combobox['values'] = _SIZE_CHOICES
         self.hardsub_size_combobox.grid(row=subtitle_row, column=3, sticky=tk.EW, padx=5, pady=2)
         self.hardsub_size_combobox.bind("<<ComboboxSelected>>", self._handle_combobox_selection_visual_reset)
-        ToolTip(ttk.Label(self.subtitle_settings_frame, text="Size:"), "Select or type the font size.") # Tooltip for Label
+        ToolTip(size_lbl, "Select or type the font size.") # Tooltip for Label
         ToolTip(self.hardsub_size_combobox, "Select or type the font size.") # Tooltip for Combobox
 
         subtitle_row += 1
 
         # Row 1: Color
-        ttk.Label(self.subtitle_settings_frame, text="Color (ASS &HBBGGRR):").grid(row=subtitle_row, column=0, sticky=tk.W, padx=5, pady=2)
+        color_lbl = ttk.Label(self.subtitle_settings_frame, text="Color (ASS &HBBGGRR):")
+        color_lbl.grid(row=subtitle_row, column=0, sticky=tk.W, padx=5, pady=2)
         self.hardsub_color_entry = ttk.Entry(self.subtitle_settings_frame, textvariable=self.hardsub_color_var, width=10)
         self.hardsub_color_entry.grid(row=subtitle_row, column=1, sticky=tk.EW, padx=5, pady=2)
         self.hardsub_color_button = ttk.Button(self.subtitle_settings_frame, text="Choose...", command=self._choose_hardsub_color)
         self.hardsub_color_button.grid(row=subtitle_row, column=2, sticky=tk.E, padx=5, pady=2)
-        ToolTip(ttk.Label(self.subtitle_settings_frame, text="Color (ASS &HBBGGRR):"), "Specify the primary color in ASS format (&HBBGGRR). Default is white (&H00FFFFFF).") # Tooltip for Label
+        ToolTip(color_lbl, "Specify the primary color in ASS format (&HBBGGRR). Default is white (&H00FFFFFF).") # Tooltip for Label
         ToolTip(self.hardsub_color_entry, "Specify the primary color in ASS format (&HBBGGRR). Default is white (&H00FFFFFF).") # Tooltip for Entry
         ToolTip(self.hardsub_color_button, "Open a color picker to select the primary color.") # Tooltip for Button
 
         subtitle_row += 1
 
         # Row 2: Outline Color
-        ttk.Label(self.subtitle_settings_frame, text="Outline Color:").grid(row=subtitle_row, column=0, sticky=tk.W, padx=5, pady=2)
+        outline_color_lbl = ttk.Label(self.subtitle_settings_frame, text="Outline Color:")
+        outline_color_lbl.grid(row=subtitle_row, column=0, sticky=tk.W, padx=5, pady=2)
         self.hardsub_outline_color_entry = ttk.Entry(self.subtitle_settings_frame, textvariable=self.hardsub_outline_color_var, width=10)
         self.hardsub_outline_color_entry.grid(row=subtitle_row, column=1, sticky=tk.EW, padx=5, pady=2)
         self.hardsub_outline_color_button = ttk.Button(self.subtitle_settings_frame, text="Choose...", command=self._choose_hardsub_outline_color)
         self.hardsub_outline_color_button.grid(row=subtitle_row, column=2, sticky=tk.E, padx=5, pady=2)
-        ToolTip(ttk.Label(self.subtitle_settings_frame, text="Outline Color:"), "Specify the outline color in ASS format (&HBBGGRR). Default is black (&H00000000).") # Tooltip for Label
+        ToolTip(outline_color_lbl, "Specify the outline color in ASS format (&HBBGGRR). Default is black (&H00000000).") # Tooltip for Label
         ToolTip(self.hardsub_outline_color_entry, "Specify the outline color in ASS format (&HBBGGRR). Default is black (&H00000000).") # Tooltip for Entry
         ToolTip(self.hardsub_outline_color_button, "Open a color picker to select the outline color.") # Tooltip for Button
 
         subtitle_row += 1
 
         # Row 3: Outline, Shadow
-        ttk.Label(self.subtitle_settings_frame, text="Outline:").grid(row=subtitle_row, column=0, sticky=tk.W, padx=5, pady=2)
+        outline_lbl = ttk.Label(self.subtitle_settings_frame, text="Outline:")
+        outline_lbl.grid(row=subtitle_row, column=0, sticky=tk.W, padx=5, pady=2)
         self.hardsub_outline_entry = ttk.Entry(self.subtitle_settings_frame, textvariable=self.hardsub_outline_var, width=5)
         self.hardsub_outline_entry.grid(row=subtitle_row, column=1, sticky=tk.W, padx=5, pady=2)
-        ToolTip(ttk.Label(self.subtitle_settings_frame, text="Outline:"), "Specify the outline thickness (pixels).") # Tooltip for Label
+        ToolTip(outline_lbl, "Specify the outline thickness (pixels).") # Tooltip for Label
         ToolTip(self.hardsub_outline_entry, "Specify the outline thickness (pixels).") # Tooltip for Entry
 
-        ttk.Label(self.subtitle_settings_frame, text="Shadow:").grid(row=subtitle_row, column=2, sticky=tk.W, padx=5, pady=2)
+        shadow_lbl = ttk.Label(self.subtitle_settings_frame, text="Shadow:")
+        shadow_lbl.grid(row=subtitle_row, column=2, sticky=tk.W, padx=5, pady=2)
         self.hardsub_shadow_entry = ttk.Entry(self.subtitle_settings_frame, textvariable=self.hardsub_shadow_var, width=5)
         self.hardsub_shadow_entry.grid(row=subtitle_row, column=3, sticky=tk.W, padx=5, pady=2)
-        ToolTip(ttk.Label(self.subtitle_settings_frame, text="Shadow:"), "Specify the shadow thickness (pixels).") # Tooltip for Label
+        ToolTip(shadow_lbl, "Specify the shadow thickness (pixels).") # Tooltip for Label
         ToolTip(self.hardsub_shadow_entry, "Specify the shadow thickness (pixels).") # Tooltip for Entry
 
         subtitle_row += 1
 
         # Row 4: Position
-        ttk.Label(self.subtitle_settings_frame, text="Position:").grid(row=subtitle_row, column=0, sticky=tk.W, padx=5, pady=2)
+        position_lbl = ttk.Label(self.subtitle_settings_frame, text="Position:")
+        position_lbl.grid(row=subtitle_row, column=0, sticky=tk.W, padx=5, pady=2)
         self.hardsub_position_combobox = ttk.Combobox(self.subtitle_settings_frame, textvariable=self.hardsub_position_var, width=15, state="readonly")
-        self.hardsub_position_combobox['values'] = ("Bottom Center", "Bottom Left", "Bottom Right", "Top Center", "Top Left", "Top Right")
+        self.hardsub_position_combobox['values'] = _POSITION_CHOICES
         self.hardsub_position_combobox.grid(row=subtitle_row, column=1, sticky=tk.EW, padx=5, pady=2)
         self.hardsub_position_combobox.bind("<<ComboboxSelected>>", self._handle_combobox_selection_visual_reset)
         self.hardsub_position_combobox.set("Bottom Center")
-        ToolTip(ttk.Label(self.subtitle_settings_frame, text="Position:"), "Select the subtitle position.") # Tooltip for Label
+        ToolTip(position_lbl, "Select the subtitle position.") # Tooltip for Label
         ToolTip(self.hardsub_position_combobox, "Select the subtitle position.") # Tooltip for Combobox
 
         subtitle_row += 1 # Current row for next setting
 
         # Row 5: Font Encoding/Charset
-        ttk.Label(self.subtitle_settings_frame, text="Font Encoding:").grid(row=subtitle_row, column=0, sticky=tk.W, padx=5, pady=2)
+        font_encoding_lbl = ttk.Label(self.subtitle_settings_frame, text="Font Encoding:")
+        font_encoding_lbl.grid(row=subtitle_row, column=0, sticky=tk.W, padx=5, pady=2)
         self.hardsub_font_encoding_combobox = ttk.Combobox(self.subtitle_settings_frame, textvariable=self.hardsub_font_encoding_var, width=15)
         # Add common encodings. User might need to type others.
-        self.hardsub_font_encoding_combobox['values'] = ("UTF-8", "SHIFT_JIS", "CP1252", "GBK", "Big5")
+        self.hardsub_font_encoding_combobox['values'] = _FONT_ENCODING_CHOICES
         self.hardsub_font_encoding_combobox.grid(row=subtitle_row, column=1, sticky=tk.EW, padx=5, pady=2)
         self.hardsub_font_encoding_combobox.bind("<<ComboboxSelected>>", self._handle_combobox_selection_visual_reset)
-        ToolTip(ttk.Label(self.subtitle_settings_frame, text="Font Encoding:"), "Specify the font encoding (charset) for hardsubtitles.") # Tooltip for Label
+        ToolTip(font_encoding_lbl, "Specify the font encoding (charset) for hardsubtitles.") # Tooltip for Label
         ToolTip(self.hardsub_font_encoding_combobox, "Specify the font encoding (charset) for hardsubtitles (e.g., UTF-8, SHIFT_JIS).") # Tooltip for Combobox
 
 
@@ -362,53 +512,57 @@ class VideoProcessingTab(ttk.Frame):
         # Video Settings Widgets (inside video_settings_frame)
 
         # Row 0: Resolution, CRF
-        ttk.Label(self.video_settings_frame, text="Resolution (WxH):").grid(row=video_row, column=0, sticky=tk.W, padx=5, pady=2)
+        resolution_lbl = ttk.Label(self.video_settings_frame, text="Resolution (WxH):")
+        resolution_lbl.grid(row=video_row, column=0, sticky=tk.W, padx=5, pady=2)
         self.hardsub_resolution_combobox = ttk.Combobox(self.video_settings_frame, textvariable=self.hardsub_resolution_var, width=15, state="readonly")
-        self.hardsub_resolution_combobox['values'] = ["Original", "1920x1080", "1280x720", "854x480", "640x360"]
+        self.hardsub_resolution_combobox['values'] = _RESOLUTION_CHOICES
         self.hardsub_resolution_combobox.grid(row=video_row, column=1, sticky=tk.EW, padx=5, pady=2)
         self.hardsub_resolution_combobox.bind("<<ComboboxSelected>>", self._handle_combobox_selection_visual_reset)
         self.hardsub_resolution_var.set("Original")
-        ToolTip(ttk.Label(self.video_settings_frame, text="Resolution (WxH):"), "Select output resolution. 'Original' keeps the source resolution.") # Tooltip for Label
+        ToolTip(resolution_lbl, "Select output resolution. 'Original' keeps the source resolution.") # Tooltip for Label
         ToolTip(self.hardsub_resolution_combobox, "Select output resolution. 'Original' keeps the source resolution.") # Tooltip for Combobox
 
-        ttk.Label(self.video_settings_frame, text="CRF (0-51):").grid(row=video_row, column=2, sticky=tk.W, padx=5, pady=2)
+        crf_lbl = ttk.Label(self.video_settings_frame, text="CRF (0-51):")
+        crf_lbl.grid(row=video_row, column=2, sticky=tk.W, padx=5, pady=2)
         self.hardsub_crf_entry = ttk.Entry(self.video_settings_frame, textvariable=self.hardsub_crf_var, width=5)
         self.hardsub_crf_entry.grid(row=video_row, column=3, sticky=tk.W, padx=5, pady=2)
-        ToolTip(ttk.Label(self.video_settings_frame, text="CRF (0-51):"), "Constant Rate Factor for H.264 encoding (0 is lossless, 51 is worst quality). 23 is a good default.") # Tooltip for Label
+        ToolTip(crf_lbl, "Constant Rate Factor for H.264 encoding (0 is lossless, 51 is worst quality). 23 is a good default.") # Tooltip for Label
         ToolTip(self.hardsub_crf_entry, "Constant Rate Factor for H.264 encoding (0 is lossless, 51 is worst quality). 23 is a good default.") # Tooltip for Entry
 
         video_row += 1 # Increment video row
 
         # Row 1: Encoder
-        ttk.Label(self.video_settings_frame, text="Encoder:").grid(row=video_row, column=0, sticky=tk.W, padx=5, pady=2)
+        encoder_lbl = ttk.Label(self.video_settings_frame, text="Encoder:")
+        encoder_lbl.grid(row=video_row, column=0, sticky=tk.W, padx=5, pady=2)
         self.video_encoder_combobox = ttk.Combobox(self.video_settings_frame, textvariable=self.video_encoder_var, width=15)
-        # Note: Available encoders depend on FFmpeg build. Providing common ones.
-        self.video_encoder_combobox['values'] = ("libx264", "libx265", "h264_nvenc", "hevc_nvenc", "h264_amf", "hevc_amf", "h264_qsv", "hevc_qsv", "libvpx", "libvpx-vp9", "libaom-av1")
+        self.video_encoder_combobox['values'] = _ENCODER_CHOICES
         self.video_encoder_combobox.grid(row=video_row, column=1, sticky=tk.EW, padx=5, pady=2)
         self.video_encoder_combobox.bind("<<ComboboxSelected>>", self._handle_combobox_selection_visual_reset)
-        ToolTip(ttk.Label(self.video_settings_frame, text="Encoder:"), "Select the video encoder to use.") # Tooltip for Label
+        ToolTip(encoder_lbl, "Select the video encoder to use.") # Tooltip for Label
         ToolTip(self.video_encoder_combobox, "Select the video encoder to use. Availability depends on your FFmpeg build.") # Tooltip for Combobox
 
         video_row += 1 # Increment video row
 
         # Row 2: Audio Handling
-        ttk.Label(self.video_settings_frame, text="Audio Handling:").grid(row=video_row, column=0, sticky=tk.W, padx=5, pady=2)
+        audio_handling_lbl = ttk.Label(self.video_settings_frame, text="Audio Handling:")
+        audio_handling_lbl.grid(row=video_row, column=0, sticky=tk.W, padx=5, pady=2)
         self.audio_handling_combobox = ttk.Combobox(self.video_settings_frame, textvariable=self.audio_handling_var, width=15, state="readonly")
-        self.audio_handling_combobox['values'] = ("copy", "encode")
+        self.audio_handling_combobox['values'] = _AUDIO_HANDLING_CHOICES
         self.audio_handling_combobox.grid(row=video_row, column=1, sticky=tk.EW, padx=5, pady=2)
         self.audio_handling_combobox.bind("<<ComboboxSelected>>", self._handle_combobox_selection_visual_reset)
-        ToolTip(ttk.Label(self.video_settings_frame, text="Audio Handling:"), "Select how to handle the audio stream.") # Tooltip for Label
+        ToolTip(audio_handling_lbl, "Select how to handle the audio stream.") # Tooltip for Label
         ToolTip(self.audio_handling_combobox, "Select how to handle the audio stream ('copy' to keep original, 'encode' to re-encode).") # Tooltip for Combobox
 
         video_row += 1 # Increment video row
 
         # Row 3: Format
-        ttk.Label(self.video_settings_frame, text="Format:").grid(row=video_row, column=0, sticky=tk.W, padx=5, pady=2)
+        format_lbl = ttk.Label(self.video_settings_frame, text="Format:")
+        format_lbl.grid(row=video_row, column=0, sticky=tk.W, padx=5, pady=2)
         self.output_format_combobox = ttk.Combobox(self.video_settings_frame, textvariable=self.output_format_var, width=15, state="readonly")
-        self.output_format_combobox['values'] = ("mp4", "mkv")
+        self.output_format_combobox['values'] = _OUTPUT_FORMAT_CHOICES
         self.output_format_combobox.grid(row=video_row, column=1, sticky=tk.EW, padx=5, pady=2)
         self.output_format_combobox.bind("<<ComboboxSelected>>", self._on_output_format_change) # Bind to a new handler
-        ToolTip(ttk.Label(self.video_settings_frame, text="Format:"), "Select the output container format.") # Tooltip for Label
+        ToolTip(format_lbl, "Select the output container format.") # Tooltip for Label
         ToolTip(self.output_format_combobox, "Select the output container format (e.g., mp4, mkv).") # Tooltip for Combobox
 
         video_row += 1 # Increment video row for future settings
@@ -478,28 +632,41 @@ class VideoProcessingTab(ttk.Frame):
         current_row += 1
 
 
+        # Interactive (state-bearing) settings widgets, listed once so _update_hardsub_ui_state
+        # needs no winfo_children()/configure() scans; labels always stay enabled
+        self._subtitle_state_widgets = [
+            self.hardsub_font_combobox, self.hardsub_size_combobox,
+            self.hardsub_color_entry, self.hardsub_color_button,
+            self.hardsub_outline_color_entry, self.hardsub_outline_color_button,
+            self.hardsub_outline_entry, self.hardsub_shadow_entry,
+            self.hardsub_position_combobox, self.hardsub_font_encoding_combobox,
+        ]
+        self._video_state_widgets = [
+            self.hardsub_resolution_combobox, self.hardsub_crf_entry, self.video_encoder_combobox,
+            self.audio_handling_combobox, self.output_format_combobox,
+        ]
+        self._subtitle_settings_disabled = None # Last state applied to them (None = not applied yet)
+
         # Ensure initial state of hardsub options frame is correct
         # Defer the call to ensure the frame is fully initialized
         self.after(0, self._on_processing_mode_change)
 
+    def _on_destroy(self, event):
+        """Marks the tab as gone so worker-thread updates stop scheduling UI callbacks."""
+        if event.widget is self:
+            self._alive = False
+
     def _handle_combobox_selection_visual_reset(self, event):
         """Clears the selection highlight in a combobox after an item is selected."""
         widget = event.widget
         def clear_highlight_and_refocus_away():
-            if widget.winfo_exists():
-                widget.selection_clear()
-                # Attempt to set focus to a different widget to ensure highlight is gone
-                # Find the parent frame and try to focus on it or another widget
-                parent_frame = widget.winfo_parent()
-                if parent_frame:
-                    try:
-                        parent_widget = widget.nametowidget(parent_frame)
-                        parent_widget.focus_set()
-                    except Exception:
-                        # Fallback if parent focusing fails
-                        self.focus_set()
-                else:
-                    self.focus_set()
+            # Nothing to clear if the user has already moved on (or the widget is gone).
+            # Compare Tk path names: focus_get() can raise for ttk popdown windows.
+            if not self._alive or str(widget.tk.call("focus")) != str(widget):
+                return
+            widget.selection_clear()
+            # Move focus to the tab frame so the highlight is not redrawn
+            self.focus_set()
 
         widget.after(10, clear_highlight_and_refocus_away)
 
@@ -512,11 +679,7 @@ class VideoProcessingTab(ttk.Frame):
         mode = self.process_mode_var.get()
         self.logger.info(f"Processing mode changed to: {mode}")
 
-        # Ensure hardsub options frame is always packed (visible)
-        if not self.hardsub_options_frame.winfo_ismapped():
-             self.hardsub_options_frame.pack(fill=tk.X, pady=5)
-
-        # Update the state of hardsub options based on the new mode
+        # Update the visibility and state of hardsub options based on the new mode
         self._update_hardsub_ui_state()
 
 
@@ -528,12 +691,13 @@ class VideoProcessingTab(ttk.Frame):
 
         # Determine if hardsub options frame should be visible
         hardsub_options_visible = (current_mode == "hardsub")
-        if hardsub_options_visible:
-            if not self.hardsub_options_frame.winfo_ismapped():
-                 self.hardsub_options_frame.pack(fill=tk.X, pady=5)
-        else:
-            if self.hardsub_options_frame.winfo_ismapped():
-                 self.hardsub_options_frame.pack_forget()
+        # Tracked in a flag: no winfo_ismapped() round-trip, and pack only runs on an actual change
+        if hardsub_options_visible != self._hardsub_frame_visible:
+            if hardsub_options_visible:
+                self.hardsub_options_frame.pack(fill=tk.X, pady=5)
+            else:
+                self.hardsub_options_frame.pack_forget()
+            self._hardsub_frame_visible = hardsub_options_visible
 
 
         # Determine if subtitle settings should be disabled (within hardsub mode)
@@ -546,15 +710,12 @@ class VideoProcessingTab(ttk.Frame):
 
         # Set the state for Subtitle Settings widgets
         subtitle_widgets_state = tk.DISABLED if disable_subtitle_settings else tk.NORMAL
-        if hasattr(self, 'subtitle_settings_frame') and self.subtitle_settings_frame.winfo_exists():
-            for child in self.subtitle_settings_frame.winfo_children():
-                # Labels should always remain enabled
-                if isinstance(child, ttk.Label):
-                    continue
-
-                # Apply the determined state to all other interactive widgets
-                if 'state' in child.configure():
-                     child.config(state=subtitle_widgets_state)
+        # Labels always remain enabled; apply the determined state to the interactive widgets,
+        # but only when it actually changes (mode/subtitle changes usually keep it as is)
+        if disable_subtitle_settings != self._subtitle_settings_disabled:
+            for child in self._subtitle_state_widgets:
+                child.config(state=subtitle_widgets_state)
+            self._subtitle_settings_disabled = disable_subtitle_settings
 
 
         # Video settings widgets state is controlled by the visibility of the parent video_settings_frame,
@@ -564,27 +725,17 @@ class VideoProcessingTab(ttk.Frame):
         video_widgets_state = tk.NORMAL # Always normal if hardsub_options_frame is packed
 
 
-        self.logger.debug(f"Hardsub UI state updated. Subtitle type: {sub_ext}, Mode: {current_mode}, Hardsub Options Visible: {hardsub_options_visible}, Subtitle Settings Disabled: {disable_subtitle_settings}. Video Settings Enabled: {video_widgets_state == tk.NORMAL}")
-        # Add more detailed logging for individual widget states
-        if hasattr(self, 'subtitle_settings_frame') and self.subtitle_settings_frame.winfo_exists() and hardsub_options_visible:
-            self.logger.debug("Subtitle Settings Widgets State:")
-            for child in self.subtitle_settings_frame.winfo_children():
-                if hasattr(child, 'cget'):
+        self.logger.debug("Hardsub UI state updated. Subtitle type: %s, Mode: %s, Hardsub Options Visible: %s, Subtitle Settings Disabled: %s. Video Settings Enabled: %s",
+                          sub_ext, current_mode, hardsub_options_visible, disable_subtitle_settings, video_widgets_state == tk.NORMAL)
+        # Detailed per-widget state logging costs several Tcl round-trips per child, so only do it when DEBUG is on
+        if hardsub_options_visible and self.logger.isEnabledFor(logging.DEBUG):
+            for frame_title, widgets in (("Subtitle Settings", self._subtitle_state_widgets), ("Video Settings", self._video_state_widgets)):
+                self.logger.debug("%s Widgets State:", frame_title)
+                for child in widgets:
                     try:
-                        state = child.cget('state') if 'state' in child.configure() else 'N/A (no state)'
-                        self.logger.debug(f"  - {child.winfo_class()} '{child.winfo_name()}': {state}")
+                        self.logger.debug("  - %s '%s': %s", child.winfo_class(), child.winfo_name(), child.cget('state'))
                     except Exception as e:
-                         self.logger.debug(f"  - {child.winfo_class()} error getting state: {e}")
-
-        if hasattr(self, 'video_settings_frame') and self.video_settings_frame.winfo_exists() and hardsub_options_visible:
-            self.logger.debug("Video Settings Widgets State:")
-            for child in self.video_settings_frame.winfo_children():
-                if hasattr(child, 'cget'):
-                    try:
-                        state = child.cget('state') if 'state' in child.configure() else 'N/A (no state)'
-                        self.logger.debug(f"  - {child.winfo_class()} '{child.winfo_name()}': {state}")
-                    except Exception as e:
-                         self.logger.debug(f"  - {child.winfo_class()} error getting state: {e}")
+                        self.logger.debug("  - %s error getting state: %s", child.winfo_class(), e)
 
 
     def _browse_input_subtitle(self):
@@ -609,12 +760,17 @@ class VideoProcessingTab(ttk.Frame):
         if filepath:
             self.input_video_path_var.set(filepath)
             self.logger.info(f"Input video selected for processing: {filepath}")
+            self._prefetch_video_duration(filepath)
             # Suggest output directory based on the selected video's directory
             input_dir = os.path.dirname(filepath)
             self.output_file_path_var.set(input_dir) # Set output_file_path_var to directory
             self.logger.info(f"Suggested output directory: {input_dir}")
 
 
+    def _prefetch_video_duration(self, video_path):
+        """Probes the video duration in the background so it is cached before processing starts."""
+        threading.Thread(target=ffmpeg_utils.get_video_duration, args=(video_path,), daemon=True).start()
+
     def _set_output_file(self):
         """Opens a directory dialog to select the output directory."""
         # Use askdirectory instead of asksaveasfilename
@@ -628,33 +784,40 @@ class VideoProcessingTab(ttk.Frame):
             self.logger.info(f"Output directory set to: {directory_path}")
 
     def _ass_color_to_rgb(self, ass_color_str):
-        """Converts an ASS color string (&HBBGGRR) to an RGB tuple (R, G, B)."""
-        # Remove '&H' and ensure it's 6 hex characters
+        """Converts an ASS color string (&HBBGGRR or &HAABBGGRR) to an RGB tuple (R, G, B)."""
+        # Remove '&H'; the alpha byte, if present, is above the color bits and ignored
         ass_color_str = ass_color_str.replace('&H', '').strip()
-        if len(ass_color_str) != 6:
+        if len(ass_color_str) not in (6, 8):
             self.logger.warning(f"Invalid ASS color format: {ass_color_str}. Expected &HBBGGRR.")
             return (255, 255, 255) # Default to white on error
 
         try:
-            # ASS is BBGGRR, so we need to extract in reverse order
-            b = int(ass_color_str[0:2], 16)
-            g = int(ass_color_str[2:4], 16)
-            r = int(ass_color_str[4:6], 16)
-            return (r, g, b)
+            value = int(ass_color_str, 16)
         except ValueError:
             self.logger.warning(f"Could not parse ASS color hex: {ass_color_str}. Expected hex characters.")
             return (255, 255, 255) # Default to white on error
+        # ASS is BBGGRR, so red is the lowest byte
+        return (value & 0xFF, (value >> 8) & 0xFF, (value >> 16) & 0xFF)
+
+    def _get_hardsub_color_rgb(self, color_var):
+        """Returns the RGB tuple for an ASS color variable, parsing each distinct value only once."""
+        ass_color_str = color_var.get()
+        rgb = self._ass_rgb_cache.get(ass_color_str)
+        if rgb is None:
+            rgb = self._ass_rgb_cache[ass_color_str] = self._ass_color_to_rgb(ass_color_str)
+        return rgb
 
     def _choose_hardsub_color(self):
         """Opens a color chooser dialog and updates the hardsub color variable."""
         color_code, rgb_color = tkinter.colorchooser.askcolor(parent=self.app_controller,
                                                                title="Choose Hardsub Color",
-                                                               initialcolor=self._ass_color_to_rgb(self.hardsub_color_var.get()))
+                                                               initialcolor=self._get_hardsub_color_rgb(self.hardsub_color_var))
         if color_code: # color_code is an RGB tuple (R, G, B)
             # Convert RGB tuple to ASS format &HBBGGRR
             # Tkinter returns (R, G, B) where R, G, B are 0-255
             # ASS format is &HBBGGRR (hexadecimal, Blue Green Red)
-            ass_color = f"&H{color_code[2]:02X}{color_code[1]:02X}{color_code[0]:02X}"
+            r, g, b = color_code
+            ass_color = f"&H{(b << 16) | (g << 8) | r:06X}"
             self.hardsub_color_var.set(ass_color)
             self.logger.info(f"Hardsub color selected: {ass_color}")
 
@@ -662,34 +825,91 @@ class VideoProcessingTab(ttk.Frame):
         """Opens a color chooser dialog and updates the hardsub outline color variable."""
         color_code, rgb_color = tkinter.colorchooser.askcolor(parent=self.app_controller,
                                                                title="Choose Hardsub Outline Color",
-                                                               initialcolor=self._ass_color_to_rgb(self.hardsub_outline_color_var.get()))
+                                                               initialcolor=self._get_hardsub_color_rgb(self.hardsub_outline_color_var))
         if color_code: # color_code is an RGB tuple (R, G, B)
             # Convert RGB tuple to ASS format &HBBGGRR
             # Tkinter returns (R, G, B) where R, G, B are 0-255
             # ASS format is &HBBGGRR (hexadecimal, Blue Green Red)
-            ass_color = f"&H{color_code[2]:02X}{color_code[1]:02X}{color_code[0]:02X}"
+            r, g, b = color_code
+            ass_color = f"&H{(b << 16) | (g << 8) | r:06X}"
             self.hardsub_outline_color_var.set(ass_color)
             self.logger.info(f"Hardsub outline color selected: {ass_color}")
 
-    def _set_processing_ui_state(self, processing: bool):
+    def _set_processing_ui_state(self, processing: bool, cancelling: bool = False):
+        """
+        Enables/disables the action buttons for a running (or finished) job.
+        All changes are applied together in one idle callback; calls are applied in order.
+        """
         state = tk.DISABLED if processing else tk.NORMAL
         # For output entry - may still allow copying text even when processing
         # readonly_state = "readonly" if processing else "normal"
 
-        self.browse_video_button.config(state=state)
-        self.browse_subtitle_button.config(state=state)
-        self.process_button.config(state=state) # Disable Start button when processing
-        # Enable cancel button when processing starts, disable when it finishes
-        self.cancel_proc_button.config(state=tk.NORMAL if processing else tk.DISABLED)
+        widget_states = (
+            (self.browse_video_button, state),
+            (self.browse_subtitle_button, state),
+            (self.process_button, state), # Disable Start button when processing
+            # Enable cancel button while processing (until a cancel is requested), disable when it finishes
+            (self.cancel_proc_button, tk.NORMAL if processing and not cancelling else tk.DISABLED),
+        )
+        def apply_states():
+            for widget, widget_state in widget_states:
+                widget.config(state=widget_state)
+        self._defer_ui_op(apply_states)
+
+    @contextlib.contextmanager
+    def _batch_ui(self):
+        """
+        Collects the UI operations deferred inside the block and applies them in a single idle
+        callback when the outermost block exits, so Tk redraws once (main thread only, reentrant).
+        """
+        self._ui_batch_depth += 1
+        try:
+            yield
+        finally:
+            self._ui_batch_depth -= 1
+            if self._ui_batch_depth == 0 and self._ui_batch_ops:
+                ops, self._ui_batch_ops = self._ui_batch_ops, []
+                def apply_ops():
+                    for op in ops:
+                        op()
+                self.after_idle(apply_ops)
+
+    def _defer_ui_op(self, op):
+        """Runs op on the next idle cycle, or with the enclosing _batch_ui block's other operations."""
+        if self._ui_batch_depth:
+            self._ui_batch_ops.append(op)
+        else:
+            self.after_idle(op)
+
     def _update_log_text(self, text):
-        """Updates the log text area in a thread-safe manner."""
-        if self.winfo_exists():
-            def append_text():
-                self.log_text.config(state="normal")
-                self.log_text.insert(tk.END, text + "\n")
-                self.log_text.see(tk.END)
-                self.log_text.config(state="disabled")
-            self.after(0, append_text)
+        """
+        Queues a line for the log text area (thread-safe).
+        Lines are written in batches by _flush_log_buffer, at most once per _LOG_FLUSH_INTERVAL_MS.
+        """
+        self._log_buffer.append(text)
+        if not self._log_flush_scheduled and self._alive:
+            self._log_flush_scheduled = True
+            self.after(_LOG_FLUSH_INTERVAL_MS, self._flush_log_buffer)
+
+    def _flush_log_buffer(self):
+        """Appends the buffered log lines to the view with a single insert and trims the oldest ones (main thread)."""
+        # Clear the flag first so a line appended during the drain schedules the next flush
+        self._log_flush_scheduled = False
+        if not self._log_buffer:
+            return
+        # Entries may be multi-line batches (e.g. apply_ffmpeg_output_batch), so count real lines
+        new_lines = collections.deque(maxlen=_LOG_VIEW_LINES) # Anything older would be trimmed right away
+        while self._log_buffer:
+            new_lines.extend(self._log_buffer.popleft().split("\n"))
+        self.log_text.config(state="normal")
+        self.log_text.insert(tk.END, "\n".join(new_lines) + "\n")
+        self._log_view_line_count += len(new_lines)
+        excess_lines = self._log_view_line_count - _LOG_VIEW_LINES
+        if excess_lines > 0:
+            self.log_text.delete("1.0", f"{excess_lines + 1}.0")
+            self._log_view_line_count = _LOG_VIEW_LINES
+        self.log_text.see(tk.END)
+        self.log_text.config(state="disabled")
 
     def _request_cancel_video_processing(self):
         if not self.cancel_video_processing_requested:
@@ -697,50 +917,75 @@ class VideoProcessingTab(ttk.Frame):
                 self.logger.info("Video processing cancellation requested by user.")
                 self.cancel_video_processing_requested = True
                 # Update UI state to disable buttons, including Start, while waiting for cancellation
-                self._set_processing_ui_state(processing=True)
-                self.cancel_proc_button.config(text="Cancelling...", state="disabled")
+                self._set_processing_ui_state(processing=True, cancelling=True)
+                self.cancel_proc_button.config(text="Cancelling...")
                 self.processing_status_var.set("Cancellation requested...")
-                # Terminate the FFMPEG process if it's running
-                if self._ffmpeg_process and self._ffmpeg_process.poll() is None:
-                    self.logger.info("Attempting to terminate FFMPEG process.")
+                # Interrupt the FFMPEG process if it's running; on POSIX it finalizes the output on SIGINT
+                process = self._ffmpeg_process
+                if process and process.poll() is None:
+                    self.logger.info("Sending interrupt to FFMPEG process.")
                     try:
-                        self._ffmpeg_process.terminate()
-                        # Start a thread to wait and potentially kill if terminate fails
-                        threading.Thread(target=self._wait_and_kill_ffmpeg, daemon=True).start()
+                        ffmpeg_utils.interrupt_process(process)
+                        # Kill it later if the interrupt is ignored (a Tk timer, no waiting thread)
+                        self.after(_FFMPEG_INTERRUPT_GRACE_MS, self._kill_ffmpeg_if_running, process)
                     except Exception as e:
                         self.logger.error(f"Error initiating termination of FFMPEG process: {e}")
                         self._set_processing_ui_state(False) # Re-enable buttons if terminate fails immediately
                         self.processing_status_var.set("Error cancelling process.")
 
-    def _wait_and_kill_ffmpeg(self):
-        """Waits for FFMPEG to terminate, and kills it if it doesn't in time."""
+    def _kill_ffmpeg_if_running(self, process):
+        """Kills FFMPEG if it has not exited within the grace period after the interrupt."""
+        if process.poll() is not None:
+            self.logger.info("FFMPEG process exited successfully after interrupt.")
+            return
+        self.logger.warning("FFMPEG process did not exit in time. Attempting to kill.")
         try:
-            # Wait up to 5 seconds for the process to exit after terminate()
-            self._ffmpeg_process.wait(timeout=5)
-            self.logger.info("FFMPEG process terminated successfully after request.")
-        except subprocess.TimeoutExpired:
-            self.logger.warning("FFMPEG process did not terminate in time. Attempting to kill.")
-            try:
-                self._ffmpeg_process.kill()
-                self.logger.info("FFMPEG process killed.")
-            except Exception as e:
-                self.logger.error(f"Error killing FFMPEG process: {e}")
+            process.kill()
+            self.logger.info("FFMPEG process killed.")
         except Exception as e:
-            self.logger.error(f"Unexpected error in _wait_and_kill_ffmpeg: {e}")
-        finally:
-            # The task_process_video thread's process.wait() will eventually finish
-            # and trigger the final UI update in its finally block.
-            pass # No need for UI update here
+            self.logger.error(f"Error killing FFMPEG process: {e}")
+        # The task_process_video thread's process.wait() then returns
+        # and triggers the final UI update.
 
 
+    def _set_progress_indeterminate(self, active: bool):
+        """Switches the progress bar between indeterminate animation and percentage mode (main thread only)."""
+        self._progress_indeterminate = active
+        if active:
+            self.progressbar_proc.config(mode="indeterminate")
+            self.progressbar_proc.start(50)
+        else:
+            self.progressbar_proc.stop()
+            self.progressbar_proc.config(mode="determinate")
+
     def _update_processing_progress(self, value, message=None):
-        """Updates the progress bar and status label in a thread-safe manner."""
-        if self.winfo_exists(): # Ensure tab still exists
-            self.after(0, self.processing_progress_var.set, value)
+        """
+        Updates the progress bar and status label in a thread-safe manner.
+        Calls are coalesced: only the latest value/message is applied on the next idle cycle.
+        """
+        self._last_progress = value
+        if not message and int(value) == self._last_progress_int:
+            return # Nothing visible would change
+        self._pending_progress = value
         if message:
             self.logger.info(f"VIDEO_PROC_PROGRESS: {message} ({value:.0f}%)")
-            if self.winfo_exists():
-                self.after(0, self.processing_status_var.set, message)
+            self._pending_status = message
+        if not self._ui_flush_pending and self._alive: # Ensure tab still exists
+            self._ui_flush_pending = True
+            self.after_idle(self._flush_processing_ui)
+
+    def _flush_processing_ui(self):
+        """Applies the pending progress/status values (main thread)."""
+        # Clear the flag before reading so an update racing in from a worker schedules a new flush
+        self._ui_flush_pending = False
+        progress, status = self._pending_progress, self._pending_status
+        self._pending_status = None
+        # Only redraw the bar when the whole percent moves
+        if progress is not None and int(progress) != self._last_progress_int:
+            self._last_progress_int = int(progress)
+            self.processing_progress_var.set(progress)
+        if status is not None:
+            self.processing_status_var.set(status)
 
 
     def _start_video_processing_thread(self):
@@ -752,6 +997,20 @@ class VideoProcessingTab(ttk.Frame):
         font_encoding = self.hardsub_font_encoding_var.get() # Get selected font encoding
         audio_handling = self.audio_handling_var.get() # Get selected audio handling
         output_format = self.output_format_var.get() # Get selected output format
+        # Snapshot the remaining options here on the Tk thread; the worker only reads this dict
+        job_settings = {
+            "position": self.hardsub_position_var.get(),
+            "font": self.hardsub_font_var.get(),
+            "size": self.hardsub_size_var.get(),
+            "color": self.hardsub_color_var.get(),
+            "outline_color": self.hardsub_outline_color_var.get(),
+            "outline": self.hardsub_outline_var.get(),
+            "shadow": self.hardsub_shadow_var.get(),
+            "resolution": self.hardsub_resolution_var.get(),
+            "crf": self.hardsub_crf_var.get(),
+            "ffmpeg_threads": self.ffmpeg_threads_var.get(),
+            "subtitle_language": self.app_controller.video_audio_tab.target_translation_lang_var.get(),
+        }
 
         if not video_path or not os.path.exists(video_path):
             messagebox.showerror("Input Error", "Please specify a valid input video file.", parent=self.app_controller)
@@ -778,100 +1037,29 @@ class VideoProcessingTab(ttk.Frame):
             messagebox.showerror("FFMPEG Error", "FFMPEG command not found. Please ensure FFMPEG is installed and in your system's PATH.", parent=self.app_controller)
             return
 
+        if mode == "hardsub":
+            if video_processing_tasks.should_downgrade_to_mux(sub_path, job_settings["resolution"], output_format):
+                if messagebox.askyesno("Hardsub Not Needed",
+                                       "This ASS/SSA subtitle keeps its own styles and no scaling is selected, so burning "
+                                       "it in would look the same as a soft subtitle track in MKV.\n\n"
+                                       "Add the subtitles as a soft track instead (no re-encoding, much faster)?",
+                                       parent=self.app_controller):
+                    self.logger.info("Hardsub needs no re-encode; switching this job to mux.")
+                    mode = "mux"
+
         self.cancel_video_processing_requested = False # Reset cờ cancel
-        self._set_processing_ui_state(processing=True)
-        self.processing_status_var.set(f"Starting {mode} process...")
-        self.processing_progress_var.set(0)
+        with self._batch_ui(): # Buttons, status and bar change in one redraw
+            self._set_processing_ui_state(processing=True)
+            self._defer_ui_op(lambda: self.processing_status_var.set(f"Starting {mode} process..."))
+            self._defer_ui_op(lambda: self.processing_progress_var.set(0))
+        self._last_progress_int = 0
+        self._last_progress = 0
 
         self.logger.info(f"Starting video processing thread: Mode='{mode}', Video='{video_path}', Sub='{sub_path}', Out='{out_path_full}', Encoder='{encoder}', Font Encoding='{font_encoding}', Audio Handling='{audio_handling}', Output Format='{output_format}'")
 
         thread = threading.Thread(target=video_processing_tasks.task_process_video,
-                                   args=(self.app_controller, self, video_path, sub_path, out_path_full, mode, encoder, font_encoding, audio_handling, output_format), # Pass full output path
+                                   args=(self.app_controller, self, video_path, sub_path, out_path_full, mode, encoder, font_encoding, audio_handling, output_format, job_settings), # Pass full output path
                                    daemon=True)
         # Save settings when starting processing (captures current UI state)
         self._save_settings()
         thread.start()
-
-    # Helper function to read from a pipe and put lines into a queue
-    def _enqueue_output(self, out, queue):
-        for line in iter(out.readline, ''):
-            queue.put(line)
-        out.close()
-
-    # Function to process the queues and update UI (runs in main thread)
-    def _check_ffmpeg_output_queues(self):
-        """Periodically checks the FFMPEG output queues and updates the UI."""
-        try:
-            # Process stdout queue
-            while True:
-                try:
-                    line = self._stdout_queue.get_nowait()
-                    line_strip = line.strip()
-                    self._update_log_text(line_strip)
-                    # Parse FFMPEG progress and speed from stdout
-                    if "time=" in line_strip and hasattr(self, 'video_duration') and self.video_duration and self.video_duration > 0: # Check if video_duration exists and is valid
-                        try:
-                            time_str_match = re.search(r"time=(\d{2}:\d{2}:\d{2}\.\d{2,3})", line_strip) # Allow 2 or 3 decimal places for ms
-                            if time_str_match:
-                                time_str = time_str_match.group(1)
-                                parts = time_str.split(':')
-                                h = float(parts[0])
-                                m = float(parts[1])
-                                s_parts = parts[2].split('.')
-                                s = float(s_parts[0])
-                                if len(s_parts) > 1:
-                                    s += float(f"0.{s_parts[1]}")
-                                    
-                            current_seconds = h * 3600 + m * 60 + s
-                            # Adjust progress range if needed, e.g., 10% for setup, 80% for processing, 10% for finalization
-                            progress_percent = (current_seconds / self.video_duration) * 80 # Assuming 80% for this step
-                            self._update_processing_progress(10 + progress_percent, f"Processing: {time_str} / {ffmpeg_utils.format_seconds_to_hhmmss(self.video_duration)}")
-                        except Exception as e_parse:
-                            self.logger.warning(f"Failed to parse FFMPEG progress line '{line_strip[:50]}...': {e_parse}")
-                            self._update_processing_progress(self.processing_progress_var.get(), line_strip[:100])
-
-                        speed_match = re.search(r"speed=(\d+\.\d+x)", line_strip)
-                        if speed_match:
-                            self._update_speed_label(speed_match.group(1))
-
-                    elif line_strip:
-                        self._update_processing_progress(self.processing_progress_var.get(), line_strip[:100])
-                except Empty:
-                    break # No more lines in stdout queue
-
-            # Process stderr queue
-            while True:
-                try:
-                    line = self._stderr_queue.get_nowait()
-                    line_strip = line.strip()
-                    self._update_log_text(f"ERROR: {line_strip}")
-                    # Optionally parse stderr for specific errors here
-                except Empty:
-                    break # No more lines in stderr queue
-
-        except Exception as e:
-            self.logger.error(f"Error in _check_ffmpeg_output_queues: {e}", exc_info=True)
-        finally:
-            # Schedule the next check if the process is still running
-            if self._ffmpeg_process and self._ffmpeg_process.poll() is None and self.winfo_exists():
-                self.after(100, self._check_ffmpeg_output_queues) # Check every 100ms
-
-    # Add helper function to process remaining queue output
-    def _process_remaining_queue_output(self):
-        """Processes any remaining items in the stdout/stderr queues after the process finishes."""
-        self.logger.debug("Processing remaining queue output...")
-        # Process stdout queue
-        while True:
-            try:
-                line = self._stdout_queue.get_nowait()
-                self._update_log_text(line.strip())
-            except Empty:
-                break
-        # Process stderr queue
-        while True:
-            try:
-                line = self._stderr_queue.get_nowait()
-                self._update_log_text(f"ERROR: {line.strip()}")
-            except Empty:
-                break
-        self.logger.debug("Finished processing remaining queue output.")
\ No newline at end of file
@@ -2,109 +2,257 @@ import tkinter as tk
 from tkinter import messagebox
 import logging
 import os
-import threading
 import time
 import subprocess
 import re
-from queue import Queue, Empty
+import tempfile
 
-from core import ffmpeg_utils
-from .ui_utils import show_scrollable_messagebox
+from core import ffmpeg_utils, subtitle_parser
+from .ui_utils import show_scrollable_messagebox, ask_yes_no_from_thread
 
 logger = logging.getLogger(__name__)
 
+# The stdout reader takes whatever FFMPEG has written (up to this many bytes) per read and
+# posts the complete lines of each read to the Tk thread as one batch
+FFMPEG_STDOUT_READ_CHUNK_BYTES = 65536
+
 # Placeholder for task function that will be moved here
 # def task_process_video(...):
 #     pass
 
-# Helper function to read from a pipe and put lines into a queue
-def enqueue_output(out, queue):
-    for line in iter(out.readline, ''):
-        queue.put(line)
+def pump_ffmpeg_output(tab_instance, out):
+    """
+    Reads FFMPEG's stdout until it closes (task thread) and posts the lines, together with
+    any new stderr log lines, to the Tk thread via after(0, apply_ffmpeg_output_batch, ...).
+    """
+    fd = out.fileno()
+    partial = b""
+    while True:
+        chunk = os.read(fd, FFMPEG_STDOUT_READ_CHUNK_BYTES) # Returns as soon as any output is available
+        if not chunk:
+            break
+        parts = _LINE_TERMINATORS_RE.split(partial + chunk)
+        partial = parts.pop() # Last piece may be an unfinished line
+        _post_ffmpeg_output_batch(tab_instance, [part.decode('utf-8', errors='replace').strip() for part in parts if part.strip()])
+    if partial.strip():
+        _post_ffmpeg_output_batch(tab_instance, [partial.decode('utf-8', errors='replace').strip()])
     out.close()
 
-# Function to process the queues and update UI (runs in main thread)
-def check_ffmpeg_output_queues(tab_instance):
-    """Periodically checks the FFMPEG output queues and updates the UI."""
+def _post_ffmpeg_output_batch(tab_instance, stdout_lines):
+    """Hands one batch of stdout lines plus new stderr lines to the Tk thread."""
+    stderr_lines = read_ffmpeg_stderr_lines(tab_instance)
+    if stdout_lines or stderr_lines:
+        tab_instance.after(0, apply_ffmpeg_output_batch, tab_instance, stdout_lines, stderr_lines)
+
+# Machine-readable progress: FFMPEG writes "key=value" lines to stdout every 0.5s
+# (out_time_us=..., progress=continue|end) and -nostats silences the stderr stats line
+FFMPEG_PROGRESS_ARGS = ["-progress", "pipe:1", "-nostats"]
+_LINE_TERMINATORS_RE = re.compile(rb"[\r\n]+")
+_RESOLUTION_RE = re.compile(r"\d+x\d+") # "WxH" value accepted by the scale filter
+# Larger demuxer queue per input so FFMPEG's input threads do not stall waiting on the encoder
+FFMPEG_INPUT_QUEUE_ARGS = ["-thread_queue_size", "4096"]
+
+# FFMPEG stderr is written to a temp file instead of a pipe, so a slow reader can never
+# fill the pipe buffer and stall the encoder. The stdout reader tails it with each batch.
+FFMPEG_STDERR_READ_CHUNK_BYTES = 65536
+
+def open_ffmpeg_stderr_log(tab_instance):
+    """
+    Creates the temp file FFMPEG's stderr is redirected to and opens a second handle to tail it.
+    Returns the writable file object to pass as Popen's stderr.
+    """
+    stderr_log = tempfile.NamedTemporaryFile(prefix="ffmpeg_stderr_", suffix=".log", delete=False)
+    tab_instance._stderr_log_path = stderr_log.name
+    tab_instance._stderr_log_reader = open(stderr_log.name, 'rb')
+    tab_instance._stderr_partial = b""
+    return stderr_log
+
+def read_ffmpeg_stderr_lines(tab_instance, max_bytes=FFMPEG_STDERR_READ_CHUNK_BYTES):
+    """Returns the complete new lines written to the stderr log since the last call (max_bytes=-1 reads to EOF)."""
+    reader = tab_instance._stderr_log_reader
+    if reader is None:
+        return []
+    chunk = reader.read(max_bytes)
+    if not chunk:
+        return []
+    # FFMPEG ends stats lines with '\r', so split on either line terminator
+    parts = _LINE_TERMINATORS_RE.split(tab_instance._stderr_partial + chunk)
+    tab_instance._stderr_partial = parts.pop() # Last piece may be an unfinished line
+    return [part.decode('utf-8', errors='replace') for part in parts if part]
+
+def close_ffmpeg_stderr_log(tab_instance):
+    """Closes the UI-side reader and deletes the stderr temp file."""
+    reader = tab_instance._stderr_log_reader
+    tab_instance._stderr_log_reader = None
+    if reader is not None:
+        reader.close()
+    if tab_instance._stderr_log_path:
+        try:
+            os.remove(tab_instance._stderr_log_path)
+        except OSError as e_rm:
+            tab_instance.logger.warning(f"Could not remove FFMPEG stderr log {tab_instance._stderr_log_path}: {e_rm}")
+        tab_instance._stderr_log_path = None
+
+# -progress keys kept from each block; the block is applied when its closing "progress=" line arrives
+_PROGRESS_KEYS_USED = frozenset({"out_time_us", "speed"})
+
+def _format_us_to_hhmmss(total_us):
+    """Formats integer microseconds as HH:MM:SS.ss (truncated) using integer math only."""
+    total_seconds, us = divmod(total_us, 1000000)
+    minutes, seconds = divmod(total_seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{us // 10000:02d}"
+
+def _handle_ffmpeg_progress_line(tab_instance, key, value):
+    """Applies one "key=value" line from FFMPEG's -progress output to the progress bar."""
+    block = tab_instance._ffmpeg_progress_block
+    if key != "progress":
+        if key in _PROGRESS_KEYS_USED:
+            block[key] = value
+        return
+    if value == "end":
+        block.clear()
+        tab_instance._update_processing_progress(90, "Finalizing output...")
+        return
+    if tab_instance._progress_indeterminate: # Mux: bar is just animating, nothing to report
+        return
+    percent_per_us = tab_instance._progress_percent_per_us
+    out_time_us = block.get("out_time_us", "")
+    if not percent_per_us or not out_time_us.isdigit(): # Unknown duration, or N/A/negative before the first frame
+        return
+    current_us = int(out_time_us)
+    progress_percent = min(current_us * percent_per_us, 80.0) # Assuming 80% for this step
+    message = f"Processing: {_format_us_to_hhmmss(current_us)} / {tab_instance._video_duration_text}"
+    speed = block.get("speed", "").strip()
+    if speed and speed != "N/A":
+        message += f" ({speed})"
+    tab_instance._update_processing_progress(10 + progress_percent, message)
+
+def build_encoder_threading_args(encoder, threads_setting, logger_instance=logger):
+    """
+    Returns FFMPEG args that let the software encoder use every core.
+    threads_setting is the hidden 'ffmpeg_threads' config value; "0" means auto (all cores).
+    """
+    threads = str(threads_setting).strip()
+    if not threads.isdigit():
+        logger_instance.warning(f"Invalid ffmpeg_threads setting '{threads_setting}', using 0 (auto).")
+        threads = "0"
+    args = ["-threads", threads]
+    if threads == "0": # Only widen the encoder's own pools when the user has not capped threads
+        if encoder == "libx264":
+            args.extend(["-x264-params", "threads=0:sliced-threads=0"])
+        elif encoder == "libx265":
+            args.extend(["-x265-params", "pools=*:frame-threads=0"])
+    return args
+
+# Hardware encoder family (encoder name suffix) -> FFMPEG -hwaccel method for decoding
+HW_ENCODER_HWACCEL_METHODS = {"nvenc": "cuda", "qsv": "qsv", "amf": "auto"}
+
+def get_hw_encoder_family(encoder):
+    """Returns 'nvenc', 'qsv' or 'amf' for GPU encoders, else None (software encoder)."""
+    family = encoder.rsplit("_", 1)[-1]
+    return family if family in HW_ENCODER_HWACCEL_METHODS else None
+
+def build_hwaccel_input_args(encoder):
+    """
+    Returns the -hwaccel args to put before '-i' so decoding also runs on the GPU.
+    Frames are still handed to the (CPU-only) subtitles filter in system memory;
+    FFMPEG falls back to software decoding if the codec is not supported by the GPU.
+    """
+    family = get_hw_encoder_family(encoder)
+    if family is None:
+        return []
+    return ["-hwaccel", HW_ENCODER_HWACCEL_METHODS[family]]
+
+def build_quality_args(encoder, crf_value):
+    """Maps the UI's CRF value to the equivalent constant-quality option of the encoder."""
+    family = get_hw_encoder_family(encoder)
+    if family == "nvenc":
+        return ["-rc", "vbr", "-cq", crf_value, "-b:v", "0"]
+    if family == "qsv":
+        return ["-global_quality", crf_value]
+    if family == "amf":
+        return ["-rc", "cqp", "-qp_i", crf_value, "-qp_p", crf_value]
+    return ["-preset", "medium", "-crf", crf_value]
+
+def should_downgrade_to_mux(sub_path, resolution, output_format):
+    """
+    True when a hardsub job would burn in the subtitles exactly as a player renders a
+    soft track, so a stream-copy mux gives the same result without re-encoding.
+    Only ASS/SSA qualifies: the hardsub uses its embedded styles and ignores the UI style
+    settings, while SRT/VTT are always restyled from them. It also needs no scaling and
+    MKV output (MP4 converts ASS to mov_text, dropping its styling).
+    """
+    if resolution not in (None, "", "Original"):
+        return False
+    sub_ext = os.path.splitext(sub_path)[1].lower()
+    return sub_ext in (".ass", ".ssa") and output_format == "mkv"
+
+# Audio handling option -> FFMPEG audio codec args for re-encoded (hardsub) output
+AUDIO_HANDLING_ARGS = {
+    "copy": ("-c:a", "copy"),
+    "encode": ("-c:a", "aac", "-b:a", "192k"),
+}
+
+def build_audio_args(audio_handling, logger_instance=logger):
+    """Returns the audio codec args for the selected audio handling; unknown values copy the audio."""
+    args = AUDIO_HANDLING_ARGS.get(audio_handling)
+    if args is None:
+        logger_instance.warning(f"Unknown audio handling '{audio_handling}', copying audio instead.")
+        args = AUDIO_HANDLING_ARGS["copy"]
+    return args
+
+def apply_ffmpeg_output_batch(tab_instance, stdout_lines, stderr_lines):
+    """
+    Applies a batch of FFMPEG output posted by pump_ffmpeg_output (runs in main thread).
+    Log lines go to the log in one call and the status shows only the batch's last line.
+    """
     try:
-        # Process stdout queue
-        while True:
-            try:
-                line = tab_instance._stdout_queue.get_nowait()
-                line_strip = line.strip()
-                tab_instance._update_log_text(line_strip)
-
-                # Parse FFMPEG progress if 'time=' is present and video_duration is valid
-                if "time=" in line_strip and hasattr(tab_instance, 'video_duration') and tab_instance.video_duration and tab_instance.video_duration > 0:
-                    try:
-                        time_str_match = re.search(r"time=(\d{2}:\d{2}:\d{2}\.\d{2,3})", line_strip) # Allow 2 or 3 decimal places for ms
-                        if time_str_match:
-                            time_str = time_str_match.group(1)
-                            parts = time_str.split(':')
-                            h = float(parts[0])
-                            m = float(parts[1])
-                            s_parts = parts[2].split('.')
-                            s = float(s_parts[0])
-                            if len(s_parts) > 1:
-                                s += float(f"0.{s_parts[1]}")
-                                
-                        current_seconds = h * 3600 + m * 60 + s
-                        # Adjust progress range
-                        progress_percent = (current_seconds / tab_instance.video_duration) * 80 # Assuming 80% for this step
-                        tab_instance._update_processing_progress(10 + progress_percent, f"Processing: {time_str} / {ffmpeg_utils.format_seconds_to_hhmmss(tab_instance.video_duration)}")
-
-                    except Exception as e_parse:
-                        tab_instance.logger.warning(f"Failed to parse FFMPEG progress line '{line_strip[:50]}...': {e_parse}")
-
-                # Update status with first 100 chars of line if not a progress line
-                elif line_strip:
-                    tab_instance._update_processing_progress(tab_instance.processing_progress_var.get(), line_strip[:100])
-
-            except Empty:
-                break # No more lines in stdout queue
-
-        # Process stderr queue
-        while True:
-            try:
-                line = tab_instance._stderr_queue.get_nowait()
-                line_strip = line.strip()
-                tab_instance._update_log_text(line_strip)
-                # Optionally parse stderr for specific errors here
-            except Empty:
-                break # No more lines in stderr queue
+        log_lines = []
+        for line_strip in stdout_lines:
+            # -progress output: "key=value" with no spaces; not echoed to the log (too chatty)
+            key, sep, value = line_strip.partition("=")
+            if sep and " " not in key:
+                _handle_ffmpeg_progress_line(tab_instance, key, value)
+                continue
+            log_lines.append(line_strip)
+
+        if log_lines:
+            # Update status with first 100 chars of the last line if not a progress line
+            tab_instance._update_processing_progress(tab_instance._last_progress, log_lines[-1][:100])
+
+        # New stderr output (banner, warnings and errors)
+        log_lines.extend(line.strip() for line in stderr_lines)
+        if log_lines:
+            tab_instance._update_log_text("\n".join(log_lines))
 
     except Exception as e:
-        tab_instance.logger.error(f"Error in check_ffmpeg_output_queues: {e}", exc_info=True)
-    finally:
-        # Schedule the next check if the process is still running
-        if tab_instance._ffmpeg_process and tab_instance._ffmpeg_process.poll() is None and tab_instance.winfo_exists():
-            tab_instance.after(100, lambda: check_ffmpeg_output_queues(tab_instance)) # Check every 100ms
+        tab_instance.logger.error(f"Error in apply_ffmpeg_output_batch: {e}", exc_info=True)
 
 # Add helper function to process remaining queue output
 def process_remaining_queue_output(tab_instance):
-    """Processes any remaining items in the stdout/stderr queues after the process finishes."""
+    """Processes the remaining stderr log output after the process finishes (stdout was fully posted by the reader)."""
     tab_instance.logger.debug("Processing remaining queue output...")
-    # Process stdout queue
-    while True:
-        try:
-            line = tab_instance._stdout_queue.get_nowait()
-            tab_instance._update_log_text(line.strip())
-        except Empty:
-            break
-    # Process stderr queue
-    while True:
-        try:
-            line = tab_instance._stderr_queue.get_nowait()
-            tab_instance._update_log_text(f"ERROR: {line.strip()}")
-        except Empty:
-            break
+    # Process the rest of the stderr log
+    try:
+        tail_lines = [f"ERROR: {line.strip()}" for line in read_ffmpeg_stderr_lines(tab_instance, max_bytes=-1)]
+        if tab_instance._stderr_partial.strip():
+            tail_lines.append(f"ERROR: {tab_instance._stderr_partial.decode('utf-8', errors='replace').strip()}")
+        tab_instance._stderr_partial = b""
+        if tail_lines:
+            tab_instance._update_log_text("\n".join(tail_lines))
+    finally:
+        close_ffmpeg_stderr_log(tab_instance)
     tab_instance.logger.debug("Finished processing remaining queue output.")
 
-def task_process_video(app_controller, tab_instance, video_path, sub_path, out_path, mode, encoder, font_encoding, audio_handling, output_format):
+def task_process_video(app_controller, tab_instance, video_path, sub_path, out_path, mode, encoder, font_encoding, audio_handling, output_format, job_settings):
     """
     Task to mux or hardsub using FFMPEG.
     Runs in a separate thread.
+    job_settings is a plain dict of UI options snapshotted on the Tk thread,
+    so no Tk variable is read from here.
     """
+    styled_ass_path = None # Temp ASS generated for SRT/VTT hardsub, removed when the task ends
     try:
         tab_instance.logger.info(f"FFMPEG task started for {os.path.basename(out_path)}")
 
@@ -115,17 +263,9 @@ def task_process_video(app_controller, tab_instance, video_path, sub_path, out_p
 
         # Delete output file if it already exists and user agrees (or automatically)
         if os.path.exists(out_path):
-            # Must call messagebox from the main thread if possible, but here it's a background thread.
-            # A safer way is to use tab_instance.after to call, but for simplicity, we accept a small risk
-            # Or, if app_controller has a thread-safe method to display messagebox, that's better.
-            # In this case, master=app_controller can help the dialog appear on top.
-            # However, calling directly from a background thread is not ideal.
-            # A better solution is to queue a task to the main thread to ask the user.
-            # For now, for simplicity, we will still call directly.
-            if messagebox.askyesno("Overwrite Output?",
-                                   f"Output file '{os.path.basename(out_path)}' already exists. Overwrite?",
-                                   parent=app_controller, # Giúp dialog có parent
-                                   master=app_controller): # master để cố gắng đưa dialog lên trên
+            # This is a background thread: the dialog is shown on the main thread and we wait for the answer
+            if ask_yes_no_from_thread(app_controller, "Overwrite Output?",
+                                      f"Output file '{os.path.basename(out_path)}' already exists. Overwrite?"):
                 try:
                     os.remove(out_path)
                     tab_instance.logger.info(f"Removed existing output file: {out_path}")
@@ -146,10 +286,11 @@ def task_process_video(app_controller, tab_instance, video_path, sub_path, out_p
             tab_instance.logger.info(f"Hardsub mode selected.")
 
             sub_ext = os.path.splitext(sub_path)[1].lower()
-            filter_sub_path = sub_path.replace('\\', '/')
-            filter_sub_path = filter_sub_path.replace(':', '\\:')
+            filter_sub_path = ffmpeg_utils.escape_libass_filter_path(sub_path)
 
             vf_filters = f"subtitles='{filter_sub_path}'" # Base filter
+            if font_encoding:
+                vf_filters += f":charenc={font_encoding}" # Text encoding of the subtitle file
 
             if sub_ext in ['.ass', '.ssa']:
                 tab_instance.logger.info(f"Input subtitle is {sub_ext}. Using embedded style, ignoring UI settings.")
@@ -162,72 +303,85 @@ def task_process_video(app_controller, tab_instance, video_path, sub_path, out_p
                     "Top Center": 8, "Top Left": 7, "Top Right": 9
                 }
                 # Get alignment code from the dropdown value, default to 2 if not found
-                alignment_code = position_map.get(tab_instance.hardsub_position_var.get(), 2)
+                alignment_code = position_map.get(job_settings["position"], 2)
                 tab_instance.logger.info(f"Using hardsub alignment code from dropdown: {alignment_code}")
 
-                # Construct the force_style string for non-ASS/SSA formats
-                force_style_str = (
-                    f"Fontname={tab_instance.hardsub_font_var.get()},"
-                    f"FontSize={tab_instance.hardsub_size_var.get()},"
-                    f"PrimaryColour={tab_instance.hardsub_color_var.get()},"
-                    f"OutlineColour={tab_instance.hardsub_outline_color_var.get()},"
-                    f"BorderStyle=1," # 1 for Outline+Shadow
-                    f"Outline={tab_instance.hardsub_outline_var.get()},"
-                    f"Shadow={tab_instance.hardsub_shadow_var.get()},"
-                    f"Alignment={alignment_code}"
-                )
-                vf_filters += f":force_style='{force_style_str}'"
+                # Bake the style into a temporary ASS file and burn it with the 'ass' filter,
+                # which avoids force_style overrides (and their quoting pitfalls) entirely
+                style_options = {
+                    "fontname": job_settings["font"],
+                    "fontsize": job_settings["size"],
+                    "primary_color": job_settings["color"],
+                    "outline_color": job_settings["outline_color"],
+                    "outline": job_settings["outline"],
+                    "shadow": job_settings["shadow"],
+                    "alignment": alignment_code,
+                }
+                if subtitle_parser.SUBTITLE_SUPPORTED:
+                    with tempfile.NamedTemporaryFile(prefix="hardsub_styled_", suffix=".ass", delete=False) as temp_ass_file:
+                        styled_ass_path = temp_ass_file.name
+                    if subtitle_parser.create_styled_ass_file(sub_path, styled_ass_path, style_options, encoding=font_encoding):
+                        vf_filters = f"ass='{ffmpeg_utils.escape_libass_filter_path(styled_ass_path)}'"
+                    else:
+                        tab_instance.logger.warning("Could not create styled ASS file, falling back to force_style.")
+                        os.remove(styled_ass_path)
+                        styled_ass_path = None
+
+                if not styled_ass_path:
+                    # Construct the force_style string for non-ASS/SSA formats
+                    force_style_str = (
+                        f"Fontname={style_options['fontname']},"
+                        f"FontSize={style_options['fontsize']},"
+                        f"PrimaryColour={style_options['primary_color']},"
+                        f"OutlineColour={style_options['outline_color']},"
+                        f"BorderStyle=1," # 1 for Outline+Shadow
+                        f"Outline={style_options['outline']},"
+                        f"Shadow={style_options['shadow']},"
+                        f"Alignment={alignment_code}"
+                    )
+                    vf_filters += f":force_style='{force_style_str}'"
 
 
             # Add scaling filter if selected
-            selected_resolution = tab_instance.hardsub_resolution_var.get()
+            selected_resolution = job_settings["resolution"]
             if selected_resolution and selected_resolution != "Original":
-                if re.match(r"^\d+x\d+$", selected_resolution):
+                if _RESOLUTION_RE.fullmatch(selected_resolution):
                     vf_filters += f",scale={selected_resolution}"
                 else:
                     tab_instance.logger.warning(f"Invalid resolution format for scaling: {selected_resolution}. Ignoring scale filter.")
 
             command = [
-                "ffmpeg", "-y",
-                "-i", video_path,
+                "ffmpeg", "-nostdin", "-y", # -nostdin: no keyboard handler / TTY reads
+                *FFMPEG_PROGRESS_ARGS,
+                *build_hwaccel_input_args(encoder),
+                *FFMPEG_INPUT_QUEUE_ARGS, "-i", video_path,
                 "-vf", vf_filters,
-                "-c:v", encoder, "-preset", "medium", "-crf", tab_instance.hardsub_crf_var.get(),
-                "-c:a", audio_handling, # Use audio_handling here
+                "-c:v", encoder, *build_encoder_threading_args(encoder, job_settings["ffmpeg_threads"], tab_instance.logger),
+                *build_quality_args(encoder, job_settings["crf"]),
+                *build_audio_args(audio_handling, tab_instance.logger),
                 "-f", output_format, # Use output_format here
                 out_path
             ]
-            # Adjust audio encoding based on audio_handling option
-            if audio_handling == "encode":
-                 command.extend(["-c:a", "aac", "-b:a", "192k"]) # Example audio encoding
-            elif audio_handling == "copy":
-                 command.extend(["-c:a", "copy"]) # Copy audio
-
-            # Remove placeholder if audio_handling is used
-            if "-c:a" in command[:-1]: # Ensure it's not the last element (out_path)
-                 try:
-                      # Find index of "-c:a" and remove it and the next element ("aac" or "copy")
-                      idx = command[:-1].index("-c:a")
-                      del command[idx:idx+2] # Remove -c:a and its argument (e.g., aac or copy)
-                 except ValueError:
-                      pass # Already removed or not present
 
 
         elif mode == "mux":
              tab_instance._update_processing_progress(10, f"Muxing (softsub)...")
+             # A stream-copy remux finishes in seconds, so show activity instead of a percentage
+             tab_instance.after(0, tab_instance._set_progress_indeterminate, True)
              # output_ext = os.path.splitext(out_path)[1].lower() # No longer needed, use output_format
-             subtitle_codec = "srt"
-             if output_format == "mp4":
-                 subtitle_codec = "mov_text"
+             # MP4 only accepts mov_text; MKV can carry SRT/ASS/VTT as-is (keeps ASS styling)
+             subtitle_codec = "mov_text" if output_format == "mp4" else "copy"
 
              command = [
-                 "ffmpeg", "-y",
-                 "-i", video_path, # Use original unquoted path
-                 "-i", sub_path,   # Use original unquoted path
+                 "ffmpeg", "-nostdin", "-y",
+                 *FFMPEG_PROGRESS_ARGS,
+                 *FFMPEG_INPUT_QUEUE_ARGS, "-i", video_path, # Use original unquoted path
+                 *FFMPEG_INPUT_QUEUE_ARGS, "-i", sub_path,   # Use original unquoted path
                  "-map", "0",      # Map all streams from first input
                  "-map", "1",      # Map all streams from second input
                  "-c", "copy",     # Copy all streams without re-encoding
                  "-c:s", subtitle_codec, # Specify subtitle codec
-                 "-metadata:s:s:0", f"language={app_controller.video_audio_tab.target_translation_lang_var.get()[:3].lower() or 'und'}", # Set language for the first subtitle track
+                 "-metadata:s:s:0", f"language={job_settings['subtitle_language'][:3].lower() or 'und'}", # Set language for the first subtitle track
                  "-metadata:s:s:0", "title=Translated Subtitles", # Set title for the first subtitle track
                  "-f", output_format, # Specify output format explicitly
                  out_path # Use original unquoted path
@@ -240,43 +394,55 @@ def task_process_video(app_controller, tab_instance, video_path, sub_path, out_p
         # Log the exact command being executed
         # Using shlex.quote for individual arguments can be more robust if paths have spaces
         # However, Popen with a list of args usually handles this well on Windows if not using shell=True
-        tab_instance.logger.info(f"Preparing FFMPEG command: {command}")
+        # Lazy %-style args: the command is only stringified when the level is enabled
+        tab_instance.logger.info("Preparing FFMPEG command: %s", command)
         # For logging, show a more readable version:
-        tab_instance.logger.info(f"Executing FFMPEG command (joined for readability): {' '.join(command)}")
+        if tab_instance.logger.isEnabledFor(logging.INFO):
+            tab_instance.logger.info("Executing FFMPEG command (joined for readability): %s", ' '.join(command))
 
 
         # Get video duration for progress calculation
         duration_seconds = ffmpeg_utils.get_video_duration(video_path)
         tab_instance.video_duration = duration_seconds # Store duration as instance variable
+        # Per-job constants for the progress handler: scale factor and formatted total
+        tab_instance._progress_percent_per_us = 80.0 / (duration_seconds * 1000000) if duration_seconds and duration_seconds > 0 else None
+        tab_instance._video_duration_text = ffmpeg_utils.format_seconds_to_hhmmss(duration_seconds)
         tab_instance.logger.info(f"Input video duration: {tab_instance.video_duration if tab_instance.video_duration is not None else 'N/A'} seconds")
+        if mode == "hardsub" and not duration_seconds:
+            # out_time_us cannot be turned into a percentage; animate the bar until progress=end instead
+            tab_instance.after(0, tab_instance._set_progress_indeterminate, True)
 
         startupinfo = ffmpeg_utils._get_startup_info_for_windows()
-        # Capture stderr separately
-        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                                   text=True, encoding='utf-8', errors='replace', startupinfo=startupinfo, bufsize=1)
+        tab_instance._ffmpeg_progress_block.clear()
+        # stderr goes to a temp file (tailed by the stdout reader), stdout stays a pipe
+        stderr_log = open_ffmpeg_stderr_log(tab_instance)
+        try:
+            process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=stderr_log,
+                                       startupinfo=startupinfo,
+                                       bufsize=0, # stdout is read with os.read() in chunks, no Python-side buffer
+                                       # Own session on POSIX so cancel can interrupt FFMPEG cleanly
+                                       **ffmpeg_utils.get_process_group_popen_kwargs())
+        except Exception:
+            close_ffmpeg_stderr_log(tab_instance)
+            raise
+        finally:
+            stderr_log.close() # FFMPEG holds its own handle; ours is no longer needed
         tab_instance._ffmpeg_process = process # Store process object
+        tab_instance.logger.info(f"FFMPEG stderr is being written to: {tab_instance._stderr_log_path}")
 
-        # Start threads to read stdout and stderr
-        tab_instance._stdout_thread = threading.Thread(target=enqueue_output, args=(process.stdout, tab_instance._stdout_queue), daemon=True)
-        tab_instance._stderr_thread = threading.Thread(target=enqueue_output, args=(process.stderr, tab_instance._stderr_queue), daemon=True)
-        tab_instance._stdout_thread.start()
-        tab_instance._stderr_thread.start()
-        tab_instance.logger.info("Started stdout/stderr reading threads.")
-
-        # Start periodic check of queues in the main thread
-        tab_instance.after(100, lambda: check_ffmpeg_output_queues(tab_instance)) # Start the periodic check
-
-        # Wait for the process to finish (this will block the thread until process exits)
+        # Read stdout until FFMPEG closes it (posting batches to the UI), then reap the process
+        pump_ffmpeg_output(tab_instance, process.stdout)
         final_returncode = process.wait()
         tab_instance.logger.info(f"FFMPEG process finished with return code: {final_returncode}")
 
-        # Ensure all remaining output is processed from queues before final UI update
-        tab_instance.after(0, lambda: process_remaining_queue_output(tab_instance)) # Process any lines left in queues
+        # Ensure the rest of the stderr log is processed before final UI update
+        tab_instance.after(0, lambda: process_remaining_queue_output(tab_instance))
 
         is_cancelled = tab_instance.cancel_video_processing_requested
 
         # Ensure UI is updated correctly in the main thread based on final state
         def final_proc_ui_update_after_task():
+            tab_instance._set_progress_indeterminate(False)
             tab_instance._set_processing_ui_state(False) # Always re-enable buttons
             # Reset Cancel button text
             tab_instance.cancel_proc_button.config(text="Cancel Processing")
@@ -298,7 +464,7 @@ def task_process_video(app_controller, tab_instance, video_path, sub_path, out_p
                 error_message_content += "Please check the 'FFmpeg Output' log area above for details on the error.\n"
                 error_message_content += "Common issues: invalid input/output paths, incorrect hardsub options, corrupted input files."
 
-                tab_instance._update_processing_progress(tab_instance.processing_progress_var.get(), f"Processing failed (code {final_returncode}).")
+                tab_instance._update_processing_progress(tab_instance._last_progress, f"Processing failed (code {final_returncode}).")
                 tab_instance.after(0, lambda title=error_message_title, msg=error_message_content:
                            show_scrollable_messagebox(app_controller, title, msg, tab_instance.default_font_family, tab_instance.default_font_size))
 
@@ -327,9 +493,13 @@ def task_process_video(app_controller, tab_instance, video_path, sub_path, out_p
         # Ensure threads are joined or handled if still running (daemon=True helps with this on app exit)
         # Clean up process reference
         tab_instance._ffmpeg_process = None
-        # Queues are handled by daemon threads, they should clean up on program exit.
-        # No need to explicitly clear them here.
-
+        if tab_instance._progress_indeterminate: # Error paths skip the final UI update
+            tab_instance.after(0, tab_instance._set_progress_indeterminate, False)
+        if styled_ass_path and os.path.exists(styled_ass_path):
+            try:
+                os.remove(styled_ass_path)
+            except OSError as e_rm_ass:
+                tab_instance.logger.warning(f"Could not remove temporary styled ASS file {styled_ass_path}: {e_rm_ass}")
         # The final UI update is now scheduled *after* process.wait() in the main try block,
         # ensuring it happens only once and after the process truly finishes or is cancelled.
         pass # No need for another final UI update here
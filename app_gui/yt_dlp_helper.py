@@ -4,12 +4,53 @@ from tkinter import messagebox
 import os
 import subprocess
 import shutil
+import tempfile
 import re
+import selectors
 import logging
 import threading # Import threading here
+import time
 
 logger = logging.getLogger(__name__) # Will be app_gui.yt_dlp_helper
 
+# yt-dlp stdout patterns, compiled once instead of on every output line.
+# One anchored alternation classifies the three filename lines in a single pass; lastgroup tells which matched.
+_RE_FILENAME = re.compile(
+    r'\[info\] Output: (?P<out>.*)'
+    r'|\[(?:ExtractAudio|download|Fixup\w*)\] Destination: (?P<dest>.*)'
+    r'|\[Merger\] Merging formats into "(?P<merge>[^"]+)"'
+)
+_RE_PROGRESS = re.compile(r"\[download\]\s+([0-9\.]+)\%")
+# yt-dlp redraws its progress line with '\r' when not printing newlines, so both end a line
+_LINE_TERMINATORS_RE = re.compile(rb"[\r\n]+")
+
+# Download progress is forwarded to the UI at most this often and only when it moved this much
+YT_DLP_PROGRESS_MIN_INTERVAL_S = 0.1
+YT_DLP_PROGRESS_MIN_STEP_PERCENT = 0.5
+
+# Mode-specific yt-dlp arguments (built once, appended to each download's command)
+_AUDIO_ONLY_ARGS = (
+    "-x",  # Extract audio
+    "--audio-format", "wav",
+    "--audio-quality", "0", # yt-dlp will select the best and convert if needed
+    # Add --ppa (postprocessor arguments) to pass args to the ffmpeg postprocessor
+    "--ppa", "ffmpeg:-ar 16000 -ac 1", # Force 16kHz mono after download
+)
+_VIDEO_ARGS = (
+    # Priority sorting: highest resolution, then mp4 video, m4a audio
+    # then generic mp4 video, finally any best format
+    "-S", "res,ext:mp4:m4a", # Sort priority by resolution, then mp4 video, m4a audio
+    # Try to recode to mp4 if the original video format is not mp4
+    # This ensures the output is mp4 if possible, useful for later muxing.
+    "--recode-video", "mp4",
+)
+
+# While yt-dlp is silent, the stdout loop wakes this often to check for cancellation (not on Windows)
+YT_DLP_CANCEL_POLL_INTERVAL_S = 0.1
+
+# stdout is read with read1() in chunks of up to this many bytes and split into lines in Python
+YT_DLP_STDOUT_READ_CHUNK_BYTES = 65536
+
 def check_yt_dlp_command_exists():
     if shutil.which("yt-dlp"):
         logger.info("yt-dlp command found in PATH.")
@@ -26,6 +67,23 @@ def _get_subprocess_startup_info():
         return startupinfo
     return None
 
+def _drain_pipe(pipe, chunks):
+    """Collects everything written to the pipe until EOF (runs in its own thread)."""
+    for chunk in iter(lambda: pipe.read1(YT_DLP_STDOUT_READ_CHUNK_BYTES), b""):
+        chunks.append(chunk)
+    pipe.close()
+
+def _read_yt_dlp_final_path(record_path):
+    """Returns the last path yt-dlp wrote to the --print-to-file record if that file exists, else None."""
+    try:
+        with open(record_path, encoding='utf-8', errors='replace') as record_file:
+            paths = [line.strip() for line in record_file if line.strip()]
+    except OSError:
+        return None
+    if paths and os.path.isfile(paths[-1]):
+        return paths[-1]
+    return None
+
 def start_yt_dlp_download_task(url, app_controller, video_audio_tab_instance, download_audio_only=False):
     """
     Starts video/audio download task using yt-dlp in a separate thread.
@@ -41,7 +99,7 @@ def start_yt_dlp_download_task(url, app_controller, video_audio_tab_instance, do
     video_audio_tab_instance._clear_all_process_states() # Clear previous process states
     video_audio_tab_instance.progress_var.set(0)
     video_audio_tab_instance.video_file_var.set(f"Preparing yt-dlp download...") # Temporary message
-    logger.info(f"Starting yt-dlp download for URL: {url}")
+    logger.info("Starting yt-dlp download for URL: %s", url)
 
     thread = threading.Thread(target=_task_download_with_yt_dlp_entry,
                                args=(url, app_controller, video_audio_tab_instance, download_audio_only),
@@ -49,11 +107,14 @@ def start_yt_dlp_download_task(url, app_controller, video_audio_tab_instance, do
     thread.start()
     return True # Task has been started (in thread)
 
-def _task_download_with_yt_dlp_entry(url, app_controller, video_audio_tab_instance, download_audio_only=True):
+def _task_download_with_yt_dlp_entry(url, app_controller, video_audio_tab_instance, download_audio_only=False):
     """
     Task running in a thread to download with yt-dlp.
     """
     output_file_path_final = None # Final file path after download completes
+    cancel_event = video_audio_tab_instance._cancel_event # Set by the tab's Cancel button; is_set() is polled per chunk
+    stdout_selector = None
+    final_path_record = None # Temp file yt-dlp writes the final output path to
     try:
         video_audio_tab_instance._update_progress(5, "Initializing yt-dlp...")
 
@@ -66,41 +127,46 @@ def _task_download_with_yt_dlp_entry(url, app_controller, video_audio_tab_instan
         # %(ext)s: File extension.
         output_template = "%(title).200B.%(ext)s"
         command.extend(["-o", output_template])
+        # Ask yt-dlp for the final path (after post-processing and moving) as structured output.
+        # --print-to-file (unlike --print) keeps normal stdout, so progress parsing still works;
+        # the stdout filename parsing below is only the fallback.
+        record_fd, final_path_record = tempfile.mkstemp(prefix="yt_dlp_final_path_", suffix=".txt", dir=output_dir)
+        os.close(record_fd)
+        command.extend(["--print-to-file", "after_move:%(filepath)s", final_path_record])
 
 
         if download_audio_only:
-            command.extend([
-                "-x",  # Extract audio
-                "--audio-format", "wav",
-                "--audio-quality", "0", # yt-dlp will select the best and convert if needed
-                 # Add --ppa (postprocessor arguments) to pass args to the ffmpeg postprocessor
-                "--ppa", "ffmpeg:-ar 16000 -ac 1" # Force 16kHz mono after download
-            ])
+            command.extend(_AUDIO_ONLY_ARGS)
             target_ext_expected = ".wav"
         else: # Download video (and accompanying audio)
-            command.extend([
-                # Priority sorting: highest resolution, then mp4 video, m4a audio
-                # then generic mp4 video, finally any best format
-                "-S", "res,ext:mp4:m4a", # Sort priority by resolution, then mp4 video, m4a audio
-                # Try to recode to mp4 if the original video format is not mp4
-                # This ensures the output is mp4 if possible, useful for later muxing.
-                "--recode-video", "mp4",
-            ])
+            command.extend(_VIDEO_ARGS)
             target_ext_expected = ".mp4"
         command.append(url) # Final URL
 
-        logger.info(f"Executing yt-dlp command: {' '.join(command)}")
+        if logger.isEnabledFor(logging.INFO): # Skip the join when INFO is filtered out
+            logger.info("Executing yt-dlp command: %s", ' '.join(command))
         video_audio_tab_instance.video_file_var.set(f"yt-dlp downloading...") # Update UI
 
         startupinfo = _get_subprocess_startup_info()
+        # Binary pipes: stdout is read in chunks and split into lines here (see YT_DLP_STDOUT_READ_CHUNK_BYTES)
         process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                                   text=True, encoding='utf-8', errors='replace',
-                                   startupinfo=startupinfo, bufsize=1) # bufsize=1 for line buffering
+                                   startupinfo=startupinfo, bufsize=YT_DLP_STDOUT_READ_CHUNK_BYTES)
+        # stderr is drained concurrently so warnings filling its pipe can never block yt-dlp (and our stdout reads)
+        stderr_chunks = []
+        stderr_thread = threading.Thread(target=_drain_pipe, args=(process.stderr, stderr_chunks), daemon=True)
+        stderr_thread.start()
+        if os.name != 'nt': # select() does not work on Windows pipes; there read1() blocks until output arrives
+            stdout_selector = selectors.DefaultSelector()
+            stdout_selector.register(process.stdout, selectors.EVENT_READ)
 
         final_filename_from_yt_dlp = None # Final filename reported by yt-dlp
+        partial = b"" # Unfinished line carried over to the next chunk
+        last_progress_time = 0.0 # monotonic time of the last progress update sent to the UI
+        last_progress_percent = -1.0
+        log_stdout_lines = logger.isEnabledFor(logging.DEBUG) # Checked once; the per-line debug log is the hottest call
 
         while True:
-            if video_audio_tab_instance.cancel_requested:
+            if cancel_event.is_set():
                 logger.info("yt-dlp download cancelled by user during process.")
                 if process.poll() is None: # If process is still running
                     process.terminate()
@@ -108,61 +174,77 @@ def _task_download_with_yt_dlp_entry(url, app_controller, video_audio_tab_instan
                     except subprocess.TimeoutExpired: process.kill() # If it doesn't stop, kill it
                 return # Exit task
 
-            line = process.stdout.readline()
-            if not line and process.poll() is not None: # No more output and process has stopped
-                break # Exit loop
+            if stdout_selector is not None and not stdout_selector.select(timeout=YT_DLP_CANCEL_POLL_INTERVAL_S):
+                continue # No output yet; go back to the cancel check
+            chunk = process.stdout.read1(YT_DLP_STDOUT_READ_CHUNK_BYTES) # Whatever is available, up to the limit
+            if chunk:
+                parts = _LINE_TERMINATORS_RE.split(partial + chunk)
+                partial = parts.pop() # Last piece may be an unfinished line
+            else: # EOF: the process closed stdout, so flush the unfinished last line
+                parts, partial = [partial], b""
 
-            if line:
-                line_strip = line.strip()
-                logger.debug(f"yt-dlp stdout: {line_strip}")
+            for raw_line in parts:
+                line_strip = raw_line.decode('utf-8', errors='replace').strip()
+                if not line_strip:
+                    continue
+                if log_stdout_lines:
+                    logger.debug("yt-dlp stdout: %s", line_strip)
 
                 # Improved filename extraction logic
-                match_info_output = re.search(r"^\[info\] Output: (.*)", line_strip)
-                if match_info_output:
-                    final_filename_from_yt_dlp = os.path.basename(match_info_output.group(1).strip("\"'"))
-                    logger.info(f"yt-dlp final output file detected (from [info] Output): {final_filename_from_yt_dlp}")
-
-                # If no [info] Output, try Destination lines (usually for intermediate steps or simple downloads)
-                if not final_filename_from_yt_dlp:
-                    match_dest = re.search(r"\[(?:ExtractAudio|download|Fixup\w*)\] Destination: (.*)", line_strip)
-                    if match_dest:
-                        potential_fn = os.path.basename(match_dest.group(1).strip("\"'"))
+                # Priority: [info] Output always wins; otherwise the first Destination (with the expected
+                # extension) or Merger line is kept
+                match_filename = _RE_FILENAME.match(line_strip) if line_strip.startswith("[") else None
+                if match_filename:
+                    line_kind = match_filename.lastgroup
+                    if line_kind == "out":
+                        final_filename_from_yt_dlp = os.path.basename(match_filename.group("out").strip("\"'"))
+                        logger.info("yt-dlp final output file detected (from [info] Output): %s", final_filename_from_yt_dlp)
+
+                    # If no [info] Output, try Destination lines (usually for intermediate steps or simple downloads)
+                    elif not final_filename_from_yt_dlp and line_kind == "dest":
+                        potential_fn = os.path.basename(match_filename.group("dest").strip("\"'"))
                         # Only take if it matches the expected extension (sign of the final file)
                         if potential_fn.lower().endswith(target_ext_expected):
                             final_filename_from_yt_dlp = potential_fn
-                            logger.info(f"yt-dlp (post-process/direct) destination updated: {final_filename_from_yt_dlp}")
+                            logger.info("yt-dlp (post-process/direct) destination updated: %s", final_filename_from_yt_dlp)
 
-                if not final_filename_from_yt_dlp: # Still no match, try Merger line
-                    match_merger = re.search(r"Merging formats into \"([^\"]+)\"", line_strip)
-                    if match_merger:
-                        final_filename_from_yt_dlp = os.path.basename(match_merger.group(1).strip("\"'"))
-                        logger.info(f"yt-dlp merged file detected: {final_filename_from_yt_dlp}")
+                    elif not final_filename_from_yt_dlp: # Still no match, take the Merger line
+                        final_filename_from_yt_dlp = os.path.basename(match_filename.group("merge").strip("\"'"))
+                        logger.info("yt-dlp merged file detected: %s", final_filename_from_yt_dlp)
 
 
-                # Parse progress percentage
-                progress_match = re.search(r"\[download\]\s+([0-9\.]+)\%", line_strip)
+                # Parse progress percentage (only '[download]' lines can carry one)
+                progress_match = _RE_PROGRESS.match(line_strip) if line_strip.startswith("[download]") else None
                 if progress_match:
                     try:
                         percent = float(progress_match.group(1))
-                        # Assume download takes 90% of total progress, first 5% is init, final 5% is post-processing
-                        video_audio_tab_instance._update_progress(5 + (percent * 0.9), f"yt-dlp: {percent:.1f}%")
+                        # Throttled: yt-dlp prints many progress lines per second and each update is a Tk event
+                        now = time.monotonic()
+                        if percent >= 100 or (now - last_progress_time >= YT_DLP_PROGRESS_MIN_INTERVAL_S
+                                               and abs(percent - last_progress_percent) >= YT_DLP_PROGRESS_MIN_STEP_PERCENT):
+                            last_progress_time, last_progress_percent = now, percent
+                            # Assume download takes 90% of total progress, first 5% is init, final 5% is post-processing
+                            video_audio_tab_instance._update_progress(5 + (percent * 0.9), f"yt-dlp: {percent:.1f}%")
                     except ValueError:
                          video_audio_tab_instance._update_progress(video_audio_tab_instance.progress_var.get(), f"yt-dlp: Processing...")
 
+            if not chunk:
+                break # No more output: the process has finished or closed stdout
 
         # Wait for the process to finish completely and get the exit code
-        stdout_rem, stderr_rem = process.communicate() # Get remaining output (if any)
-        logger.debug(f"yt-dlp final stdout after communicate: {stdout_rem.strip()}")
-        return_code = process.returncode
+        return_code = process.wait()
+        process.stdout.close()
+        stderr_thread.join(timeout=5) # stderr reaches EOF when the process exits
+        stderr_rem = b"".join(stderr_chunks).decode('utf-8', errors='replace')
 
-        if video_audio_tab_instance.cancel_requested: # Check again after communicate
+        if cancel_event.is_set(): # Check again after the process has exited
             logger.info("yt-dlp download cancelled by user after process completion signal.")
             return
 
         if return_code != 0:
-            logger.error(f"yt-dlp failed with return code {return_code}.")
+            logger.error("yt-dlp failed with return code %s.", return_code)
             full_stderr = stderr_rem.strip()
-            logger.error(f"yt-dlp stderr: {full_stderr}")
+            logger.error("yt-dlp stderr: %s", full_stderr)
             video_audio_tab_instance.after(0, lambda: messagebox.showerror("yt-dlp Error", f"yt-dlp failed (code {return_code}).\nDetails: {full_stderr[:500]}...\nCheck logs for more.", parent=app_controller))
             video_audio_tab_instance.after(0, lambda: video_audio_tab_instance.video_file_var.set("yt-dlp failed"))
             return
@@ -170,52 +252,55 @@ def _task_download_with_yt_dlp_entry(url, app_controller, video_audio_tab_instan
         video_audio_tab_instance._update_progress(95, "yt-dlp download/processing finished.")
 
         # Determine the final file path
-        if final_filename_from_yt_dlp:
+        output_file_path_final = _read_yt_dlp_final_path(final_path_record)
+        if output_file_path_final:
+            logger.info("yt-dlp reported final output path: %s", output_file_path_final)
+        elif final_filename_from_yt_dlp:
             # Filename from yt-dlp might contain unsafe characters or be too long if the template is not well-limited.
             # Output template already has ".200B" so it's not too concerning.
             output_file_path_final = os.path.join(output_dir, final_filename_from_yt_dlp)
             if not os.path.exists(output_file_path_final):
-                logger.error(f"yt-dlp reported filename '{final_filename_from_yt_dlp}' but not found at '{output_file_path_final}'. This indicates an issue.")
+                logger.error("yt-dlp reported filename '%s' but not found at '%s'. This indicates an issue.", final_filename_from_yt_dlp, output_file_path_final)
                 output_file_path_final = None # Reset to search again
         
         if not output_file_path_final: # If no filename from stdout or that file doesn't exist
             logger.warning("Could not reliably determine final filename from yt-dlp stdout. Attempting to find latest matching file in temp directory.")
-            found_files = []
-            for f_name in os.listdir(output_dir):
-                # Check expected extension (target_ext_expected)
-                if f_name.lower().endswith(target_ext_expected):
-                    full_f_path = os.path.join(output_dir, f_name)
-                    if os.path.isfile(full_f_path):
-                        found_files.append(full_f_path)
-            
-            if found_files:
-                found_files.sort(key=os.path.getmtime, reverse=True) # Get the latest file by modification time
-                output_file_path_final = found_files[0]
-                logger.info(f"Fallback file search: Found potential output file: {output_file_path_final}")
+            # Single scandir pass keeping the newest match (DirEntry caches file type and stat results)
+            latest_mtime = -1.0
+            with os.scandir(output_dir) as entries:
+                for entry in entries:
+                    # Check expected extension (target_ext_expected)
+                    if entry.name.lower().endswith(target_ext_expected) and entry.is_file():
+                        entry_mtime = entry.stat().st_mtime
+                        if entry_mtime > latest_mtime:
+                            latest_mtime = entry_mtime
+                            output_file_path_final = entry.path
+
+            if output_file_path_final:
+                logger.info("Fallback file search: Found potential output file: %s", output_file_path_final)
             else:
-                logger.error(f"yt-dlp finished, but no output file with extension '{target_ext_expected}' found in '{output_dir}'.")
+                logger.error("yt-dlp finished, but no output file with extension '%s' found in '%s'.", target_ext_expected, output_dir)
                 video_audio_tab_instance.after(0, lambda: messagebox.showerror("yt-dlp Error", f"yt-dlp completed, but no output file with extension '{target_ext_expected}' could be found. Check logs and temporary folder: '{output_dir}'.", parent=app_controller))
                 return
 
         if os.path.exists(output_file_path_final):
-            logger.info(f"File downloaded/processed by yt-dlp: {output_file_path_final}")
+            logger.info("File downloaded/processed by yt-dlp: %s", output_file_path_final)
             video_audio_tab_instance.after(0, video_audio_tab_instance._process_selected_file, output_file_path_final, "yt-dlp")
         else: # This case is very rare if the logic above ran correctly
-            logger.error(f"yt-dlp process finished but determined output file not found: {output_file_path_final}")
+            logger.error("yt-dlp process finished but determined output file not found: %s", output_file_path_final)
             video_audio_tab_instance.after(0, lambda: messagebox.showerror("yt-dlp Error", f"yt-dlp seemed to finish, but the output file '{os.path.basename(output_file_path_final or 'unknown')}' was not found. Check logs.", parent=app_controller))
 
     except Exception as e:
-        logger.error(f"Unexpected error during yt-dlp task: {e}", exc_info=True)
+        logger.error("Unexpected error during yt-dlp task: %s", e, exc_info=True)
         video_audio_tab_instance.after(0, lambda: messagebox.showerror("yt-dlp Processing Error", f"An unexpected error occurred during yt-dlp processing: {e}", parent=app_controller))
         video_audio_tab_instance.after(0, lambda: video_audio_tab_instance.video_file_var.set("yt-dlp processing error"))
     finally:
-        is_cancelled = video_audio_tab_instance.cancel_requested # Save cancel state before calling after
-        
-        def final_ui_update_yt_dlp(): # Function to run in the main thread
-            if is_cancelled:
-                video_audio_tab_instance._clear_all_process_states() # Clean up if user cancelled
-                video_audio_tab_instance.video_file_var.set("Download cancelled")
-            video_audio_tab_instance._set_ui_state(False) # Always re-enable UI
-            video_audio_tab_instance.progress_var.set(0) # Always reset progress to 0
-            
-        video_audio_tab_instance.after(0, final_ui_update_yt_dlp)
+        if stdout_selector is not None:
+            stdout_selector.close()
+        if final_path_record is not None:
+            try:
+                os.remove(final_path_record)
+            except OSError as e_rm:
+                logger.warning("Could not remove yt-dlp path record %s: %s", final_path_record, e_rm)
+        # Final UI update runs in the main thread; the cancel state is read now and passed along
+        video_audio_tab_instance.after(0, video_audio_tab_instance._finalize_yt_dlp_download, cancel_event.is_set())
@@ -1,8 +1,10 @@
 # EasyAISubbing/core/config_manager.py
+import atexit
 import configparser
 import os
 import logging
 import sys # For determining app root path more reliably
+import threading
 
 logger = logging.getLogger(__name__) # Should be core.config_manager
 CONFIG_FILE_NAME = "app_settings.ini"
@@ -28,48 +30,140 @@ _CONFIG_FILE_PATH = os.path.join(_get_app_root_path(), CONFIG_FILE_NAME)
 logger.info(f"Application settings file path determined as: {_CONFIG_FILE_PATH}")
 
 
+# The file is parsed once; reads are served from memory and changes are written back by flush_config().
+# _config_lock guards the cached parser (settings are loaded and saved from worker threads too).
+_config_cache = None
+_config_dirty = False
+_config_lock = threading.RLock()
+# (section, key) -> parsed value for settings read through _load_typed_setting; dropped when the key is saved
+_typed_cache = {}
+# Saves are written once no further change arrived for this long, so a burst of changes costs one write
+CONFIG_FLUSH_DELAY_SECONDS = 0.5
+_flush_timer = None
+
 def _read_config():
-    """Reads the config file and returns the ConfigParser object."""
-    config = configparser.ConfigParser()
-    if os.path.exists(_CONFIG_FILE_PATH):
-        try:
-            config.read(_CONFIG_FILE_PATH, encoding='utf-8')
-        except configparser.Error as e:
-            logger.warning(f"Could not read config file {_CONFIG_FILE_PATH}: {e}. A new one may be created or defaults used.")
-    return config
+    """Returns the cached ConfigParser object, reading the config file on first use."""
+    global _config_cache
+    with _config_lock:
+        if _config_cache is None:
+            config = configparser.ConfigParser()
+            if os.path.exists(_CONFIG_FILE_PATH):
+                try:
+                    config.read(_CONFIG_FILE_PATH, encoding='utf-8')
+                except configparser.Error as e:
+                    logger.warning(f"Could not read config file {_CONFIG_FILE_PATH}: {e}. A new one may be created or defaults used.")
+            _config_cache = config
+        return _config_cache
 
 def _write_config(config):
-    """Writes the ConfigParser object to the config file."""
+    """
+    Writes the ConfigParser object to the config file.
+    The data goes to a temp file that then replaces the config file, so a crash mid-write
+    never leaves a truncated INI behind.
+    """
+    # The directory for the config file is created once by initialize_config_if_needed()
+    temp_path = _CONFIG_FILE_PATH + ".tmp"
     try:
-        # Ensure the directory for the config file exists
-        config_dir = os.path.dirname(_CONFIG_FILE_PATH)
-        if config_dir and not os.path.exists(config_dir): # Check if config_dir is not empty (e.g. saving to current dir)
-            os.makedirs(config_dir, exist_ok=True)
-            logger.info(f"Created directory for config file: {config_dir}")
-
-        with open(_CONFIG_FILE_PATH, 'w', encoding='utf-8') as configfile:
+        with open(temp_path, 'w', encoding='utf-8') as configfile:
             config.write(configfile)
+        os.replace(temp_path, _CONFIG_FILE_PATH) # Atomic on POSIX and NTFS
     except IOError as e:
         logger.error(f"Error writing config file {_CONFIG_FILE_PATH}: {e}")
+        _remove_temp_config_file(temp_path)
     except Exception as e_general:
         logger.error(f"An unexpected error occurred while writing config to {_CONFIG_FILE_PATH}: {e_general}")
+        _remove_temp_config_file(temp_path)
+
+def _remove_temp_config_file(temp_path):
+    """Deletes a leftover temp file from a failed config write."""
+    try:
+        os.unlink(temp_path)
+    except OSError:
+        pass # Never created, or already gone
+
+def _mark_config_dirty():
+    """Records that the cached config has changes not yet written to disk (call with _config_lock held)."""
+    global _config_dirty
+    _config_dirty = True
+
+def _schedule_config_flush():
+    """(Re)starts the debounce timer that writes pending changes with flush_config()."""
+    global _flush_timer
+    with _config_lock:
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+        _flush_timer = threading.Timer(CONFIG_FLUSH_DELAY_SECONDS, flush_config)
+        _flush_timer.daemon = True
+        _flush_timer.start()
+
+def flush_config():
+    """Writes the cached config to disk if it has unsaved changes."""
+    global _config_dirty
+    with _config_lock:
+        if not _config_dirty:
+            return
+        _write_config(_read_config())
+        _config_dirty = False
 
 
 # --- Generic Save/Load ---
 def save_setting(key, value, section=CONFIG_SECTION_USER):
     """Saves a setting to the specified section (default: UserSettings)."""
-    config = _read_config()
-    if not config.has_section(section):
-        config.add_section(section)
-    config.set(section, key, str(value)) # Ensure value is string
-    _write_config(config)
+    with _config_lock:
+        config = _read_config()
+        if not config.has_section(section):
+            config.add_section(section)
+        config.set(section, key, value if isinstance(value, str) else str(value)) # Ensure value is string
+        _typed_cache.pop((section, key), None)
+        _mark_config_dirty()
+    _schedule_config_flush()
     logger.debug(f"Saved setting to [{section}]: {key} = {value}")
 
 def load_setting(key, default=None, section=CONFIG_SECTION_USER):
     """Loads a setting from the specified section (default: UserSettings)."""
-    config = _read_config()
-    # The fallback mechanism of config.get() is preferred
-    return config.get(section, key, fallback=default)
+    with _config_lock:
+        config = _read_config()
+        # The fallback mechanism of config.get() is preferred
+        return config.get(section, key, fallback=default)
+
+def _load_typed_setting(key, parse, default, section=CONFIG_SECTION_USER):
+    """
+    Returns parse(stored value) for a setting, or default if it is not stored.
+    The parsed value is cached until the setting is saved again; parse errors propagate to the caller.
+    """
+    cache_key = (section, key)
+    with _config_lock:
+        if cache_key in _typed_cache:
+            return _typed_cache[cache_key]
+        raw_value = load_setting(key, None, section)
+        if raw_value is None:
+            return default
+        value = parse(raw_value)
+        _typed_cache[cache_key] = value
+        return value
+
+# --- Bulk Save/Load (one file read/write for many keys) ---
+def save_settings(settings, section=CONFIG_SECTION_USER):
+    """Saves a dict of settings to the specified section as one change (one debounced file write)."""
+    with _config_lock:
+        config = _read_config()
+        if not config.has_section(section):
+            config.add_section(section)
+        for key, value in settings.items():
+            config.set(section, key, value if isinstance(value, str) else str(value))
+            _typed_cache.pop((section, key), None)
+        _mark_config_dirty()
+    _schedule_config_flush()
+    logger.debug(f"Saved {len(settings)} settings to [{section}]")
+
+def load_settings(keys_with_defaults, section=CONFIG_SECTION_USER):
+    """
+    Loads several settings from one read of the file.
+    keys_with_defaults maps each key to its default; returns a dict of key -> value.
+    """
+    with _config_lock:
+        config = _read_config()
+        return {key: config.get(section, key, fallback=default) for key, default in keys_with_defaults.items()}
 
 
 # --- Specific Settings Wrappers ---
@@ -89,11 +183,13 @@ def load_api_key():
         logger.info("Using Gemini API key from environment variable GEMINI_API_KEY.")
         
         # If API key is found in environment variable, remove it from config file if it exists
-        config = _read_config()
-        if config.has_section(CONFIG_SECTION_INTERNAL) and config.has_option(CONFIG_SECTION_INTERNAL, "gemini_api_key"):
-            logger.info("Removing API key from config file as it's available via environment variable.")
-            config.remove_option(CONFIG_SECTION_INTERNAL, "gemini_api_key")
-            _write_config(config)
+        with _config_lock:
+            config = _read_config()
+            if config.has_section(CONFIG_SECTION_INTERNAL) and config.has_option(CONFIG_SECTION_INTERNAL, "gemini_api_key"):
+                logger.info("Removing API key from config file as it's available via environment variable.")
+                config.remove_option(CONFIG_SECTION_INTERNAL, "gemini_api_key")
+                _mark_config_dirty()
+        flush_config()
             
         return env_api_key
 
@@ -108,12 +204,11 @@ def load_last_gemini_model(): # For VideoAudioTab primarily
     return load_setting("video_audio_last_gemini_model", "gemini-1.5-pro-latest") # Default to a good one
 
 def save_gemini_temperature(temperature): # For VideoAudioTab primarily
-    save_setting("video_audio_gemini_temperature", str(temperature))
+    save_setting("video_audio_gemini_temperature", temperature)
 
 def load_gemini_temperature(default=0.25): # For VideoAudioTab primarily
     try:
-        val_str = load_setting("video_audio_gemini_temperature", str(default))
-        return float(val_str)
+        return _load_typed_setting("video_audio_gemini_temperature", float, float(default))
     except (ValueError, TypeError):
         logger.warning(f"Could not parse video_audio_gemini_temperature, using default {default}")
         return float(default)
@@ -133,11 +228,10 @@ def load_target_translation_language(default="English"): # For VideoAudioTab pri
 
 # --- yt-dlp specific ---
 def save_yt_dlp_audio_only(value: bool): # For VideoAudioTab
-    save_setting("yt_dlp_audio_only", str(value))
+    save_setting("yt_dlp_audio_only", value)
 
 def load_yt_dlp_audio_only(default=False) -> bool: # For VideoAudioTab
-    val_str = load_setting("yt_dlp_audio_only", str(default))
-    return val_str.lower() == 'true'
+    return _load_typed_setting("yt_dlp_audio_only", lambda val_str: val_str.lower() == 'true', bool(default))
 
 # --- Context Keywords for VideoAudioTab ---
 def save_va_context_keywords(keywords_text: str):
@@ -176,31 +270,46 @@ def load_va_context_keywords(default=""):
 
 
 # --- Function to ensure config file exists with default sections ---
+_config_initialized = False
+
 def initialize_config_if_needed():
     """
     Checks if the config file exists. If not, or if it's malformed,
     it can create a new one with default sections.
     This is useful on first run.
+    Called once by the main window at startup (not on import); repeat calls are no-ops.
     """
+    global _config_initialized
+    if _config_initialized:
+        return
+    _config_initialized = True
+    # Ensure the directory for the config file exists (once, instead of checking on every write)
+    try:
+        os.makedirs(os.path.dirname(_CONFIG_FILE_PATH) or ".", exist_ok=True)
+    except OSError as e:
+        logger.error(f"Could not create directory for config file {_CONFIG_FILE_PATH}: {e}")
     config_needs_writing = False
-    config = _read_config() # Reads existing or creates empty if not found/malformed
-
-    if not config.has_section(CONFIG_SECTION_USER):
-        config.add_section(CONFIG_SECTION_USER)
-        logger.info(f"Added default section [{CONFIG_SECTION_USER}] to config.")
-        config_needs_writing = True
-    if not config.has_section(CONFIG_SECTION_INTERNAL):
-        config.add_section(CONFIG_SECTION_INTERNAL)
-        logger.info(f"Added default section [{CONFIG_SECTION_INTERNAL}] to config.")
-        config_needs_writing = True
-
+    with _config_lock:
+        config = _read_config() # Reads existing or creates empty if not found/malformed
+
+        if not config.has_section(CONFIG_SECTION_USER):
+            config.add_section(CONFIG_SECTION_USER)
+            logger.info(f"Added default section [{CONFIG_SECTION_USER}] to config.")
+            config_needs_writing = True
+        if not config.has_section(CONFIG_SECTION_INTERNAL):
+            config.add_section(CONFIG_SECTION_INTERNAL)
+            logger.info(f"Added default section [{CONFIG_SECTION_INTERNAL}] to config.")
+            config_needs_writing = True
+
+        if config_needs_writing:
+            # You could pre-populate with some very basic default keys here if desired
+            # For example:
+            # if not config.has_option(CONFIG_SECTION_USER, "video_audio_target_language"):
+            #     config.set(CONFIG_SECTION_USER, "video_audio_target_language", "English")
+            _mark_config_dirty()
     if config_needs_writing:
-        # You could pre-populate with some very basic default keys here if desired
-        # For example:
-        # if not config.has_option(CONFIG_SECTION_USER, "video_audio_target_language"):
-        #     config.set(CONFIG_SECTION_USER, "video_audio_target_language", "English")
-        _write_config(config)
+        flush_config()
         logger.info(f"Initialized or updated config file at: {_CONFIG_FILE_PATH}")
 
-# Call initialize on module load to ensure sections exist
-initialize_config_if_needed()
+# Write any save still waiting on the debounce timer when the app exits
+atexit.register(flush_config)
@@ -5,6 +5,13 @@ import logging
 import re # Import re for regex parsing
 import json # Import json for ffprobe output parsing
 import time # Import time for generating unique temp filenames
+import functools
+import signal
+import struct
+import collections
+import io
+import shutil
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -17,29 +24,141 @@ def _get_startup_info_for_windows():
         return startupinfo
     return None
 
+def _get_creation_flags_for_windows():
+    """Returns CREATE_NO_WINDOW on Windows so no console is allocated for the child, else 0."""
+    if os.name == 'nt':
+        return subprocess.CREATE_NO_WINDOW
+    return 0
+
+# Whether interrupt_process() lets FFMPEG finalize its output. CTRL_BREAK only reaches processes
+# sharing our console, and FFMPEG runs with CREATE_NO_WINDOW, so Windows has no graceful stop.
+CAN_INTERRUPT_GRACEFULLY = os.name != 'nt'
+
+def get_process_group_popen_kwargs():
+    """
+    Popen kwargs for an FFMPEG that interrupt_process() will stop. On POSIX the child gets its
+    own session, so SIGINT reaches only it; on Windows it just gets no console window.
+    """
+    if os.name == 'nt':
+        return {"creationflags": _get_creation_flags_for_windows()}
+    return {"start_new_session": True}
+
+def interrupt_process(process):
+    """
+    Asks a process started with get_process_group_popen_kwargs() to stop.
+    On POSIX it sends SIGINT, which FFMPEG handles by flushing and finalizing the output file.
+    On Windows (see CAN_INTERRUPT_GRACEFULLY) it terminates the process; the output is not finalized.
+    """
+    if not CAN_INTERRUPT_GRACEFULLY:
+        process.terminate()
+        return
+    try:
+        process.send_signal(signal.SIGINT)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not send interrupt to process {process.pid}: {e}. Terminating instead.")
+        process.terminate()
+
+# Set after the first successful check; a failed check is not remembered, so installing a tool later is picked up
+_ffmpeg_found = False
+_yt_dlp_found = False
+
 def check_ffmpeg_exists():
-    """Checks if ffmpeg is accessible."""
+    """Checks if ffmpeg is accessible (spawns 'ffmpeg -version' only until it has succeeded once)."""
+    global _ffmpeg_found
+    if _ffmpeg_found:
+        return True
     try:
         startupinfo = _get_startup_info_for_windows()
         subprocess.run(["ffmpeg", "-version"], check=True, capture_output=True, text=True, startupinfo=startupinfo)
         logger.info("FFMPEG found.")
+        _ffmpeg_found = True
         return True
     except (subprocess.CalledProcessError, FileNotFoundError):
         logger.error("FFMPEG command not found. Please ensure FFMPEG is installed and in your system's PATH.")
         return False
 
+@functools.lru_cache(maxsize=1)
+def list_available_encoders():
+    """
+    Returns a frozenset of the encoder names compiled into the installed FFMPEG
+    (parsed from 'ffmpeg -hide_banner -encoders'). Probed once per run;
+    returns an empty frozenset if FFMPEG cannot be run.
+    """
+    try:
+        startupinfo = _get_startup_info_for_windows()
+        process = subprocess.run(["ffmpeg", "-hide_banner", "-encoders"], check=True, capture_output=True, text=True, encoding='utf-8', errors='replace', startupinfo=startupinfo)
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        logger.warning(f"Could not list FFMPEG encoders: {e}")
+        return frozenset()
+    # The encoder table follows a ' ------' separator; each row is '<flags> <name> <description>'
+    _, _, table = process.stdout.partition("------")
+    encoders = frozenset(fields[1] for fields in (line.split(None, 2) for line in table.splitlines()) if len(fields) >= 2)
+    logger.info(f"FFMPEG reports {len(encoders)} encoders.")
+    return encoders
+
 def check_yt_dlp_exists():
-    """Checks if yt-dlp is accessible."""
+    """Checks if yt-dlp is accessible (spawns 'yt-dlp --version' only until it has succeeded once)."""
+    global _yt_dlp_found
+    if _yt_dlp_found:
+        return True
     try:
         startupinfo = _get_startup_info_for_windows()
         # Use --version or -U (update) as a lightweight check
         subprocess.run(["yt-dlp", "--version"], check=True, capture_output=True, text=True, startupinfo=startupinfo)
         logger.info("yt-dlp found.")
+        _yt_dlp_found = True
         return True
     except (subprocess.CalledProcessError, FileNotFoundError):
         logger.error("yt-dlp command not found. Please ensure yt-dlp is installed and in your system's PATH.")
         return False
 
+# How many trailing FFMPEG stderr lines are kept for error reports
+FFMPEG_STDERR_TAIL_LINES = 200
+# Captured FFMPEG stdout is copied to its destination in chunks of this size
+FFMPEG_STDOUT_COPY_CHUNK_BYTES = 1024 * 1024
+
+def _run_ffmpeg(command, stdout_file=None):
+    """
+    Runs an FFMPEG command, streaming its stderr line by line instead of buffering it whole,
+    so a long file's progress output costs at most FFMPEG_STDERR_TAIL_LINES lines of memory.
+    With stdout_file (a binary file object), stdout (e.g. PCM written to pipe:1) is copied into it
+    chunk by chunk; otherwise it is discarded.
+    Returns the stderr tail as a string; raises subprocess.CalledProcessError (stderr = tail)
+    on a non-zero exit and FileNotFoundError if FFMPEG is missing, like subprocess.run(check=True).
+    """
+    stderr_tail = collections.deque(maxlen=FFMPEG_STDERR_TAIL_LINES)
+    log_lines = logger.isEnabledFor(logging.DEBUG)
+    process = subprocess.Popen(command, stdin=subprocess.DEVNULL,
+                               stdout=subprocess.PIPE if stdout_file is not None else subprocess.DEVNULL,
+                               stderr=subprocess.PIPE, startupinfo=_get_startup_info_for_windows())
+
+    def read_stderr():
+        # Universal newlines, so FFMPEG's '\r'-redrawn progress lines are split too
+        with io.TextIOWrapper(process.stderr, encoding='utf-8', errors='replace') as stderr_text:
+            for line in stderr_text:
+                line = line.rstrip()
+                if not line:
+                    continue
+                stderr_tail.append(line)
+                if log_lines:
+                    logger.debug("FFMPEG: %s", line)
+
+    if stdout_file is not None:
+        # Both pipes are open, so stderr is drained on its own thread while stdout is copied here
+        stderr_thread = threading.Thread(target=read_stderr, daemon=True)
+        stderr_thread.start()
+        with process.stdout:
+            shutil.copyfileobj(process.stdout, stdout_file, FFMPEG_STDOUT_COPY_CHUNK_BYTES)
+        stderr_thread.join()
+    else:
+        read_stderr() # stdout is discarded, so reading stderr on this thread cannot deadlock
+    returncode = process.wait()
+    tail = "\n".join(stderr_tail)
+    if returncode != 0:
+        # Callers log e.stderr, which is now just the tail rather than the whole log
+        raise subprocess.CalledProcessError(returncode, command, stderr=tail)
+    return tail
+
 def extract_audio(video_path, output_audio_path="temp_extracted_audio.wav"):
     """
     Extracts audio from a video file to WAV format.
@@ -66,15 +185,12 @@ def extract_audio(video_path, output_audio_path="temp_extracted_audio.wav"):
     ]
     logger.info(f"Executing FFMPEG to extract audio: {' '.join(command)}")
     try:
-        startupinfo = _get_startup_info_for_windows()
-        process = subprocess.run(command, check=True, capture_output=True, text=True, startupinfo=startupinfo)
-        logger.debug(f"FFMPEG stdout (extract_audio): {process.stdout}")
-        logger.debug(f"FFMPEG stderr (extract_audio): {process.stderr}")
+        stderr_tail = _run_ffmpeg(command)
         if os.path.exists(output_audio_path) and os.path.getsize(output_audio_path) > 0:
             logger.info(f"Audio successfully extracted to: {output_audio_path}")
             return output_audio_path
         else:
-            logger.error(f"FFMPEG ran but output file {output_audio_path} is missing or empty. Stderr: {process.stderr}")
+            logger.error(f"FFMPEG ran but output file {output_audio_path} is missing or empty. Stderr: {stderr_tail}")
             return None
     except subprocess.CalledProcessError as e:
         logger.error(f"FFMPEG error during audio extraction: {e.stderr}")
@@ -84,6 +200,61 @@ def extract_audio(video_path, output_audio_path="temp_extracted_audio.wav"):
         return None
 
 
+# Size of the RIFF/WAVE header written by _wav_header
+WAV_HEADER_BYTES = 44
+
+def _wav_header(pcm_size, sample_rate=16000, channels=1, sample_width=2):
+    """Returns the 44-byte RIFF/WAVE header for pcm_size bytes of little-endian PCM."""
+    byte_rate = sample_rate * channels * sample_width
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + pcm_size, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, byte_rate, channels * sample_width, sample_width * 8,
+        b"data", pcm_size
+    )
+
+def extract_audio_to_wav_bytes(video_path):
+    """
+    Like extract_audio, but returns the 16 kHz mono WAV as bytes instead of writing a file.
+    FFMPEG writes raw PCM to stdout, which is streamed into a buffer behind a reserved header;
+    the header is patched in once the size is known, so the audio is held in memory only once.
+    Returns None on failure.
+    """
+    if not check_ffmpeg_exists():
+        return None
+
+    command = [
+        "ffmpeg", "-nostdin",
+        "-i", video_path,
+        "-vn",                  # No video
+        "-f", "s16le",          # Raw PCM, no container
+        "-acodec", "pcm_s16le",
+        "-ar", "16000",         # Sample rate (Gemini prefers 16kHz for ASR tasks)
+        "-ac", "1",             # Mono channel
+        "pipe:1"
+    ]
+    logger.info(f"Executing FFMPEG to extract audio to memory: {' '.join(command)}")
+    wav_buffer = io.BytesIO()
+    wav_buffer.write(bytes(WAV_HEADER_BYTES)) # Placeholder, filled in below
+    try:
+        stderr_tail = _run_ffmpeg(command, stdout_file=wav_buffer)
+    except subprocess.CalledProcessError as e:
+        logger.error(f"FFMPEG error during audio extraction: {e.stderr}")
+        return None
+    except FileNotFoundError:
+        logger.error("FFMPEG command not found. Ensure it is installed and in PATH.")
+        return None
+    pcm_size = wav_buffer.tell() - WAV_HEADER_BYTES
+    if pcm_size <= 0:
+        logger.error(f"FFMPEG produced no audio data for {video_path}. Stderr: {stderr_tail}")
+        return None
+    wav_buffer.seek(0)
+    wav_buffer.write(_wav_header(pcm_size))
+    logger.info(f"Audio extracted to memory: {pcm_size / (1024 * 1024):.1f} MB of PCM")
+    # getvalue() hands over BytesIO's own buffer (no copy) since nothing else references it
+    return wav_buffer.getvalue()
+
+
 def extract_audio_segment(full_audio_path, start_time_sec, end_time_sec, output_segment_path):
     """
     Extracts a segment from an audio file. (Currently unused in the latest workflow but kept)
@@ -115,15 +286,12 @@ def extract_audio_segment(full_audio_path, start_time_sec, end_time_sec, output_
     ]
     logger.info(f"Executing FFMPEG for segment: {' '.join(command)}")
     try:
-        startupinfo = _get_startup_info_for_windows()
-        process = subprocess.run(command, check=True, capture_output=True, text=True, startupinfo=startupinfo)
-        logger.debug(f"FFMPEG segment stdout: {process.stdout}")
-        logger.debug(f"FFMPEG segment stderr: {process.stderr}")
+        stderr_tail = _run_ffmpeg(command)
         if os.path.exists(output_segment_path) and os.path.getsize(output_segment_path) > 0:
             logger.info(f"Audio segment successfully extracted to: {output_segment_path}")
             return output_segment_path
         else:
-            logger.error(f"FFMPEG ran for segment but output {output_segment_path} is missing or empty. Stderr: {process.stderr}")
+            logger.error(f"FFMPEG ran for segment but output {output_segment_path} is missing or empty. Stderr: {stderr_tail}")
             return None
     except subprocess.CalledProcessError as e:
         logger.error(f"FFMPEG error extracting audio segment: {e.stderr}")
@@ -132,42 +300,101 @@ def extract_audio_segment(full_audio_path, start_time_sec, end_time_sec, output_
         logger.error("FFMPEG command not found during segment extraction.")
         return None
 
-def get_video_duration(video_path):
+# abs_path -> ((mtime, size), parsed ffprobe JSON (format + streams)), least recently used first.
+# One entry per path (a modified file replaces its old entry), at most PROBE_CACHE_MAX_FILES paths;
+# only successful probes are cached. The tab's duration prefetch and the job thread share it, hence the lock.
+PROBE_CACHE_MAX_FILES = 16
+_probe_cache = collections.OrderedDict()
+_probe_cache_lock = threading.Lock()
+
+def _file_signature(file_path):
+    """Returns (mtime, size), which changes when the file is replaced or modified, or None if it cannot be stat'ed."""
+    try:
+        stat_result = os.stat(file_path)
+    except OSError:
+        return None
+    return (stat_result.st_mtime_ns, stat_result.st_size)
+
+def _ffprobe_full(file_path):
     """
-    Gets the duration of a video file in seconds using ffprobe.
-    Returns duration in seconds or None on failure.
+    Runs ffprobe once for the container format and all streams and returns the parsed JSON dict.
+    Duration, resolution and subtitle track lookups all read from this result, which is cached
+    per file (path, checked against mtime + size), so one file costs one ffprobe run.
+    Returns None on failure.
     """
+    cache_path = os.path.abspath(file_path)
+    signature = _file_signature(file_path)
+    if signature is not None:
+        with _probe_cache_lock:
+            cached = _probe_cache.get(cache_path)
+            if cached is not None and cached[0] == signature:
+                _probe_cache.move_to_end(cache_path)
+                return cached[1]
+
     if not check_ffmpeg_exists(): # ffprobe is usually bundled
         return None
 
     command = [
-        "ffprobe", "-v", "error", "-show_entries",
-        "format=duration", "-of", "default=noprint_wrappers=1:nokey=1",
-        video_path
+        "ffprobe", "-v", "error",
+        "-print_format", "json",
+        "-show_format", "-show_streams",
+        file_path
     ]
-    logger.info(f"Executing ffprobe to get duration: {' '.join(command)}")
+    logger.info(f"Executing ffprobe: {' '.join(command)}")
     try:
         startupinfo = _get_startup_info_for_windows()
-        process = subprocess.run(command, check=True, capture_output=True, text=True, startupinfo=startupinfo)
-        duration_str = process.stdout.strip()
-        if duration_str:
-            try:
-                duration_seconds = float(duration_str)
-                logger.info(f"Video duration found: {duration_seconds:.2f} seconds")
-                return duration_seconds
-            except ValueError:
-                logger.error(f"Could not parse ffprobe duration output: {duration_str}")
-                return None
-        else:
-            logger.error(f"ffprobe returned empty duration for {video_path}. Stderr: {process.stderr}")
-            return None
+        process = subprocess.run(command, check=True, capture_output=True, text=True, encoding='utf-8', errors='replace', startupinfo=startupinfo)
     except subprocess.CalledProcessError as e:
-        logger.error(f"ffprobe error getting duration: {e.stderr}")
+        logger.error(f"ffprobe error for {file_path}: {e.stderr}")
         return None
     except FileNotFoundError:
         logger.error("ffprobe command not found. Ensure FFMPEG (with ffprobe) is installed and in PATH.")
         return None
 
+    try:
+        data = json.loads(process.stdout)
+    except json.JSONDecodeError as e_json:
+        logger.error(f"Could not decode ffprobe JSON output for {file_path}: {e_json}. Output: {process.stdout[:500]}...")
+        return None
+    if signature is not None:
+        with _probe_cache_lock:
+            _probe_cache[cache_path] = (signature, data)
+            _probe_cache.move_to_end(cache_path)
+            while len(_probe_cache) > PROBE_CACHE_MAX_FILES:
+                _probe_cache.popitem(last=False)
+    return data
+
+def get_video_duration(video_path):
+    """
+    Gets the duration of a video file in seconds using ffprobe.
+    Backed by the cached _ffprobe_full() result, so repeated calls are free.
+    Returns duration in seconds or None on failure.
+    """
+    data = _ffprobe_full(video_path)
+    if data is None:
+        return None
+    duration_str = data.get("format", {}).get("duration")
+    if not duration_str:
+        logger.error(f"ffprobe returned empty duration for {video_path}.")
+        return None
+    try:
+        duration_seconds = float(duration_str)
+    except ValueError:
+        logger.error(f"Could not parse ffprobe duration output: {duration_str}")
+        return None
+    logger.info(f"Video duration found: {duration_seconds:.2f} seconds")
+    return duration_seconds
+
+def escape_libass_filter_path(file_path):
+    """
+    Escapes a file path for use inside single quotes in a 'subtitles='/'ass=' filter argument.
+    Backslashes become '/', ':' (e.g. drive letters) is escaped for the filter option parser,
+    and a literal "'" closes the quote, emits an escaped quote and reopens it.
+    """
+    escaped = file_path.replace('\\', '/')
+    escaped = escaped.replace(':', '\\:')
+    return escaped.replace("'", r"'\\\''")
+
 def format_seconds_to_hhmmss(seconds):
     """
     Formats seconds into HH:MM:SS.ss string.
@@ -181,34 +408,25 @@ def format_seconds_to_hhmmss(seconds):
 
 def get_video_resolution(video_path):
     """
-    Gets the resolution (widthxheight) of a video file using ffprobe.
+    Gets the resolution (widthxheight) of a video file using ffprobe (first video stream).
     Returns resolution string (e.g., "1920x1080") or None on failure.
     """
-    if not check_ffmpeg_exists(): # ffprobe is usually bundled
+    data = _ffprobe_full(video_path)
+    if data is None:
         return None
+    for stream in data.get("streams", []):
+        if stream.get("codec_type") == "video":
+            width, height = stream.get("width"), stream.get("height")
+            if width and height:
+                resolution_str = f"{width}x{height}"
+                logger.info(f"Video resolution found: {resolution_str}")
+                return resolution_str
+            break
+    logger.error(f"ffprobe found no video stream with a resolution in {video_path}.")
+    return None
 
-    command = [
-        "ffprobe", "-v", "error", "-select_streams", "v:0",
-        "-show_entries", "stream=width,height", "-of",
-        "csv=p=0:s=x", video_path
-    ]
-    logger.info(f"Executing ffprobe to get resolution: {' '.join(command)}")
-    try:
-        startupinfo = _get_startup_info_for_windows()
-        process = subprocess.run(command, check=True, capture_output=True, text=True, startupinfo=startupinfo)
-        resolution_str = process.stdout.strip()
-        if resolution_str and 'x' in resolution_str:
-            logger.info(f"Video resolution found: {resolution_str}")
-            return resolution_str
-        else:
-            logger.error(f"ffprobe returned invalid resolution output for {video_path}: {resolution_str}. Stderr: {process.stderr}")
-            return None
-    except subprocess.CalledProcessError as e:
-        logger.error(f"ffprobe error getting resolution: {e.stderr}")
-        return None
-    except FileNotFoundError:
-        logger.error("ffprobe command not found during resolution check.")
-        return None
+# Text subtitle codecs that can be extracted to SRT/ASS (bitmap formats like PGS/VobSub cannot)
+_TEXT_SUBTITLE_CODECS = frozenset({'srt', 'ass', 'ssa', 'webvtt', 'subrip', 'mov_text', 'text'})
 
 def list_subtitle_tracks(video_path):
     """
@@ -216,62 +434,30 @@ def list_subtitle_tracks(video_path):
     Returns a list of dictionaries, each describing a subtitle stream, or None on failure.
     Each dictionary includes 'index', 'codec_name', 'language', and 'title'.
     """
-    if not check_ffmpeg_exists(): # ffprobe is usually bundled
+    data = _ffprobe_full(video_path)
+    if data is None:
         return None
 
-    # Command to list subtitle streams in JSON format
-    # select_streams s: subtitle streams
-    # show_entries stream=index,codec_name,tags:language,tags:title : extract index, codec, language tag, title tag
-    # of json: output format is JSON
-    command = [
-        "ffprobe", "-v", "error", "-select_streams", "s",
-        "-show_entries", "stream=index,codec_name,codec_type,tags",
-        "-of", "json",
-        video_path
-    ]
-    logger.info(f"Executing ffprobe to list subtitle tracks: {' '.join(command)}")
-    try:
-        startupinfo = _get_startup_info_for_windows()
-        process = subprocess.run(command, check=True, capture_output=True, text=True, startupinfo=startupinfo)
-        output_json = process.stdout.strip()
-
-        if not output_json:
-            logger.info(f"No subtitle tracks found or ffprobe output empty for {video_path}. Stderr: {process.stderr.strip()}")
-            return [] # Return empty list if no subtitle tracks found
-
-        try:
-            data = json.loads(output_json)
-            streams = data.get('streams', [])
-            subtitle_tracks = []
-            for stream in streams:
-                track_info = {
-                    'index': stream.get('index'),
-                    'codec_name': stream.get('codec_name'),
-                    'language': stream.get('tags', {}).get('language', 'unknown'),
-                    'title': stream.get('tags', {}).get('title', 'N/A')
-                }
-                # Only include actual subtitle streams, filtering out potential garbage
-                if track_info['codec_name'] in ['srt', 'ass', 'ssa', 'webvtt', 'subrip', 'mov_text', 'text']: # Add common subtitle codecs
-                    subtitle_tracks.append(track_info)
-                else:
-                    logger.debug(f"Skipping non-subtitle stream with codec: {track_info['codec_name']} (Index: {track_info['index']})")
-
-            logger.info(f"Found {len(subtitle_tracks)} usable subtitle track(s).")
-            logger.debug(f"Usable Subtitle tracks info: {subtitle_tracks}")
-            return subtitle_tracks
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse ffprobe JSON output for {video_path}: {e}. Output: {output_json[:500]}...")
-            return None
+    subtitle_tracks = []
+    for stream in data.get('streams', []):
+        if stream.get('codec_type') != 'subtitle':
+            continue
+        tags = stream.get('tags', {})
+        track_info = {
+            'index': stream.get('index'),
+            'codec_name': stream.get('codec_name'),
+            'language': tags.get('language', 'unknown'),
+            'title': tags.get('title', 'N/A')
+        }
+        # Only include text subtitle streams, which are the ones that can be extracted and edited
+        if track_info['codec_name'] in _TEXT_SUBTITLE_CODECS:
+            subtitle_tracks.append(track_info)
+        else:
+            logger.debug(f"Skipping non-text subtitle stream with codec: {track_info['codec_name']} (Index: {track_info['index']})")
 
-    except subprocess.CalledProcessError as e:
-        logger.error(f"ffprobe error listing subtitle tracks for {video_path}: {e.stderr}")
-        return None
-    except FileNotFoundError:
-        logger.error("ffprobe command not found during subtitle track listing.")
-        return None
-    except Exception as e:
-        logger.error(f"Unexpected error during subtitle track listing: {e}", exc_info=True)
-        return None
+    logger.info(f"Found {len(subtitle_tracks)} usable subtitle track(s).")
+    logger.debug(f"Usable Subtitle tracks info: {subtitle_tracks}")
+    return subtitle_tracks
 
 
 def extract_subtitle_to_temp_file(video_path, track_index, output_extension='srt', temp_dir=None):
@@ -322,17 +508,14 @@ def extract_subtitle_to_temp_file(video_path, track_index, output_extension='srt
     ]
     logger.info(f"Executing FFMPEG to extract subtitle track {track_index} to .{output_extension}: {' '.join(command)}")
     try:
-        startupinfo = _get_startup_info_for_windows()
-        process = subprocess.run(command, check=True, capture_output=True, text=True, startupinfo=startupinfo)
-        logger.debug(f"FFMPEG stdout (extract_subtitle): {process.stdout}")
-        logger.debug(f"FFMPEG stderr (extract_subtitle): {process.stderr}")
+        stderr_tail = _run_ffmpeg(command)
 
         if os.path.exists(temp_filepath_abs) and os.path.getsize(temp_filepath_abs) > 0:
             logger.info(f"Subtitle track {track_index} successfully extracted to: {temp_filepath_abs}")
             return temp_filepath_abs
         else:
              # Log stderr if the file is missing or empty
-             logger.error(f"FFMPEG ran but output file {temp_filepath_abs} is missing or empty. Stderr: {process.stderr.strip()}")
+             logger.error(f"FFMPEG ran but output file {temp_filepath_abs} is missing or empty. Stderr: {stderr_tail}")
              return None
 
     except subprocess.CalledProcessError as e:
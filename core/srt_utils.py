@@ -33,43 +33,58 @@ def parse_timecode_to_timedelta(minutes_str, seconds_str, tenth_seconds_str):
     except ValueError as e:
         raise ValueError(f"Invalid timecode component value: {e}")
 
+# Zero-padded 2-digit strings for minutes (< 100) and seconds, precomputed for the formatter below
+_SS = [f"{i:02d}" for i in range(100)]
+
+def _fmt_us(total_us):
+    """Formats a non-negative microsecond count as Gemini-style 'MM:SS,x'."""
+    total_ms = (total_us + 500) // 1000
+    minutes, rem_ms = divmod(total_ms, 60000)
+    seconds, ms = divmod(rem_ms, 1000)
+    minute_format = _SS[minutes] if minutes < 100 else str(minutes)
+    return f"{minute_format}:{_SS[seconds]},{ms // 100}"
+
 def format_timedelta_to_gemini_style(td):
     if not isinstance(td, timedelta):
         raise TypeError("Input must be a timedelta object.")
-    if td.total_seconds() < 0:
+    total_us = (td.days * 86400 + td.seconds) * 1000000 + td.microseconds
+    if total_us < 0:
         logger.warning(f"Encountered negative timedelta ({td}), formatting as 00:00,0.")
         return "00:00,0"
-    if td.total_seconds() == 0:
+    if total_us == 0:
         return "00:00,0"
-    total_seconds_val = td.total_seconds()
-    absolute_total_seconds = abs(total_seconds_val)
-    total_minutes_abs = int(absolute_total_seconds // 60)
-    remaining_seconds_float_abs = absolute_total_seconds % 60
-    effective_milliseconds_abs = round(remaining_seconds_float_abs * 1000)
-    seconds_part_abs = effective_milliseconds_abs // 1000
-    tenth_seconds_part_abs = (effective_milliseconds_abs % 1000) // 100
-    if tenth_seconds_part_abs >= 10:
-        seconds_part_abs += tenth_seconds_part_abs // 10
-        tenth_seconds_part_abs %= 10
-    if seconds_part_abs >= 60:
-        total_minutes_abs += seconds_part_abs // 60
-        seconds_part_abs %= 60
-    minute_format = f"{total_minutes_abs:02d}" if total_minutes_abs < 100 else str(total_minutes_abs)
-    second_format = f"{seconds_part_abs:02d}"
-    return f"{minute_format}:{second_format},{tenth_seconds_part_abs}"
-
-def detailed_analyze_gemini_output(lines_list):
+    return _fmt_us(total_us)
+
+def tokenize_gemini_lines(lines_or_text):
+    """
+    Splits Gemini-format text (or an already split list of lines) into tokens.
+    Each token is (stripped_line, groups) where groups is the tuple from
+    GEMINI_LINE_REGEX_PATTERN or None if the line did not match.
+    The result can be passed to the analyze/convert helpers to avoid re-lexing the same text.
+    """
+    if isinstance(lines_or_text, str):
+        lines_or_text = lines_or_text.splitlines()
+    match_line = GEMINI_LINE_REGEX_PATTERN.match
+    tokens = []
+    for line_text_original in lines_or_text:
+        stripped = line_text_original.strip()
+        match = match_line(stripped) if stripped else None
+        tokens.append((stripped, match.groups() if match else None))
+    return tokens
+
+def detailed_analyze_gemini_output(lines_list, tokens=None):
     analysis_messages = []
     previous_segment_end_time_td = timedelta(seconds=-1)
     seen_full_timestamps_for_duplicates = {}
+    if tokens is None:
+        tokens = tokenize_gemini_lines(lines_list)
 
-    for i, line_text_original in enumerate(lines_list):
+    for i, (current_line_text_stripped, groups) in enumerate(tokens):
         line_num = i + 1
-        current_line_text_stripped = line_text_original.strip()
         if not current_line_text_stripped:
             continue
 
-        match = GEMINI_LINE_REGEX_PATTERN.match(current_line_text_stripped)
+        match = groups is not None
         original_ts_block_visual_for_error = "N/A" # Default value
         if match:
              original_ts_block_visual_for_error = current_line_text_stripped[current_line_text_stripped.find("["):current_line_text_stripped.find("]")+1]
@@ -89,7 +104,6 @@ def detailed_analyze_gemini_output(lines_list):
                 )
             continue # Guard clause: exit if no match
 
-        groups = match.groups()
         s_m_str, s_s_str, s_x_str = groups[0], groups[1], groups[2]
         e_m_str, e_s_str, e_x_str = groups[3], groups[4], groups[5]
 
@@ -165,14 +179,15 @@ def detailed_analyze_gemini_output(lines_list):
             )
     return analysis_messages
 
-def convert_gemini_format_to_srt_content(gemini_output_text, apply_python_normalization=True):
+def convert_gemini_format_to_srt_content(gemini_output_text, apply_python_normalization=True, tokens=None):
     subs = []
     conversion_error_messages = []
-    lines_to_process = gemini_output_text.splitlines()
+    if tokens is None:
+        tokens = tokenize_gemini_lines(gemini_output_text)
 
     if apply_python_normalization:
-        normalized_lines, norm_log_messages = analyze_and_pre_correct_gemini_lines_for_srt(lines_to_process)
-        lines_to_process = normalized_lines
+        normalized_lines, norm_log_messages = analyze_and_pre_correct_gemini_lines_for_srt(None, tokens=tokens)
+        tokens = tokenize_gemini_lines(normalized_lines)
         if norm_log_messages:
             logger.info("SRT Pre-conversion Normalization Log (m:s,x format):")
             for log_msg in norm_log_messages:
@@ -183,22 +198,19 @@ def convert_gemini_format_to_srt_content(gemini_output_text, apply_python_normal
     subtitle_srt_index = 1
     last_valid_srt_end_time_td = timedelta(seconds=-1)
 
-    for i, line_text_original in enumerate(lines_to_process):
-        current_line_text_stripped = line_text_original.strip()
+    for i, (current_line_text_stripped, groups) in enumerate(tokens):
         if not current_line_text_stripped:
             continue
 
-        match = GEMINI_LINE_REGEX_PATTERN.match(current_line_text_stripped)
         original_ts_block_for_error_conv = "N/A"
-        if match:
+        if groups is not None:
             original_ts_block_for_error_conv = current_line_text_stripped[current_line_text_stripped.find("["):current_line_text_stripped.find("]")+1]
 
-        if not match:
+        if groups is None:
             if current_line_text_stripped and not current_line_text_stripped.startswith(("#", "//")):
                 conversion_error_messages.append(f"SRT Conv. Line {i+1}: Does not match format [m<sep>s,x - m<sep>s,x]. Skipped. Content: '{current_line_text_stripped[:70]}...'")
             continue
 
-        groups = match.groups()
         s_m_str, s_s_str, s_x_str = groups[0], groups[1], groups[2]
         e_m_str, e_s_str, e_x_str = groups[3], groups[4], groups[5]
         text_content = groups[6].strip() if groups[6] else ""
@@ -254,28 +266,27 @@ def convert_gemini_format_to_srt_content(gemini_output_text, apply_python_normal
             conversion_error_messages.append("No processable subtitle lines found in input.")
     return srt.compose(subs, reindex=True, strict=False), conversion_error_messages
 
-def analyze_and_pre_correct_gemini_lines_for_srt(lines_list):
+def analyze_and_pre_correct_gemini_lines_for_srt(lines_list, tokens=None):
     corrected_lines_output = []
     analysis_log_output = []
-    for i, line_text_original in enumerate(lines_list):
+    if tokens is None:
+        tokens = tokenize_gemini_lines(lines_list)
+    for i, (current_line_text_stripped, groups) in enumerate(tokens):
         line_num = i + 1
-        current_line_text_stripped = line_text_original.strip()
         line_to_add_this_iteration = current_line_text_stripped
 
         if not current_line_text_stripped:
             corrected_lines_output.append("")
             continue
 
-        match = GEMINI_LINE_REGEX_PATTERN.match(current_line_text_stripped)
         original_ts_block_visual_for_log = "N/A"
-        if match:
+        if groups is not None:
             original_ts_block_visual_for_log = current_line_text_stripped[current_line_text_stripped.find("["):current_line_text_stripped.find("]")+1]
 
-        if not match:
+        if groups is None:
             if TIMESTAMP_BLOCK_REGEX_PATTERN.search(current_line_text_stripped):
                 analysis_log_output.append(f"L{line_num} (SRT Norm): FORMAT ERROR - Malformed m:s,x TS (separator/digit issue?). Kept as is: '{current_line_text_stripped[:60]}...'")
         else:
-            groups = match.groups()
             s_m_str, s_s_str, s_x_str = groups[0], groups[1], groups[2]
             e_m_str, e_s_str, e_x_str = groups[3], groups[4], groups[5]
             text_content = groups[6].strip() if groups[6] else ""
@@ -295,3 +295,43 @@ def save_subtitle_file(subtitle_data: 'pysubs2.SSAFile', filepath: str):
         logger.error(f"Error saving subtitle file {os.path.basename(filepath)} with pysubs2: {e}", exc_info=True)
         return False
 
+
+# --- Hardsub helper: bake UI style options into an ASS file ---
+def _ass_color_string_to_pysubs2(color_str: str):
+    """Converts an ASS colour string ('&HAABBGGRR' or '&HBBGGRR') to a pysubs2.Color."""
+    hex_digits = color_str.strip().upper().lstrip('&').lstrip('H').rstrip('&').rjust(8, '0')
+    value = int(hex_digits[-8:], 16)
+    return pysubs2.Color(r=value & 0xFF, g=(value >> 8) & 0xFF, b=(value >> 16) & 0xFF, a=(value >> 24) & 0xFF)
+
+def create_styled_ass_file(input_filepath: str, output_filepath: str, style_options: dict, encoding: str = "utf-8") -> bool:
+    """
+    Converts a text subtitle (SRT/VTT) to ASS with the given style set as 'Default',
+    so FFMPEG's 'ass' filter can burn it in without any force_style overrides.
+    style_options keys: fontname, fontsize, primary_color, outline_color, outline, shadow, alignment.
+    Returns True on success, False on failure.
+    """
+    if not SUBTITLE_SUPPORTED:
+        logger.error("Cannot create styled ASS: Pysubs2 library is not available.")
+        return False
+
+    try:
+        subs = pysubs2.load(input_filepath, encoding=encoding or "utf-8")
+        style = subs.styles.get("Default", pysubs2.SSAStyle()).copy()
+        style.fontname = style_options["fontname"]
+        style.fontsize = float(style_options["fontsize"])
+        style.primarycolor = _ass_color_string_to_pysubs2(style_options["primary_color"])
+        style.outlinecolor = _ass_color_string_to_pysubs2(style_options["outline_color"])
+        style.borderstyle = 1 # Outline + drop shadow
+        style.outline = float(style_options["outline"])
+        style.shadow = float(style_options["shadow"])
+        alignment_enum = getattr(pysubs2, "Alignment", None) # Enum in pysubs2 >= 1.2, plain int before
+        style.alignment = alignment_enum(style_options["alignment"]) if alignment_enum else style_options["alignment"]
+        subs.styles["Default"] = style
+        for event in subs:
+            event.style = "Default"
+        subs.save(output_filepath, encoding="utf-8", format_="ass")
+        logger.info(f"Created styled ASS for hardsub: {os.path.basename(output_filepath)} ({len(subs)} events)")
+        return True
+    except Exception as e:
+        logger.error(f"Error creating styled ASS from {os.path.basename(input_filepath)}: {e}", exc_info=True)
+        return False